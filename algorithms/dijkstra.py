@@ -4,15 +4,117 @@ import heapq
 import folium
 from utils.helpers import load_data, build_map
 
+# (node IDs, ID -> index, per-node list of (neighbor index, weight))
+GraphIndex = Tuple[List[str], Dict[str, int], List[List[Tuple[int, float]]]]
+
+def _edge_weight(
+    edge_data: Dict,
+    consider_road_condition: bool,
+    condition_weight: float
+) -> float:
+    """
+    Calculate the routing weight of a road from its distance and condition.
+    
+    Args:
+        edge_data: Edge attribute dictionary
+        consider_road_condition: Whether to factor in road conditions
+        condition_weight: Weight factor for road conditions (0-1)
+    
+    Returns:
+        float: Edge weight
+    """
+    weight = edge_data.get('weight', 1.0)  # Base distance
+    if consider_road_condition:
+        condition = edge_data.get('condition', 10)
+        condition_factor = (11 - condition) * condition_weight
+        weight *= (1 + condition_factor)
+    return weight
+
+def build_graph_index(
+    graph: nx.Graph,
+    consider_road_condition: bool = False,
+    condition_weight: float = 0.3
+) -> GraphIndex:
+    """
+    Map nodes to integer indices and precompute weighted adjacency lists.
+    
+    Every routing weight is computed once here, so searches only do list
+    indexing on integers.
+    
+    Args:
+        graph: NetworkX graph
+        consider_road_condition: Whether to factor in road conditions
+        condition_weight: Weight factor for road conditions (0-1)
+    
+    Returns:
+        GraphIndex: (node IDs, ID -> index, adjacency lists)
+    """
+    nodes = list(graph.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    adjacency = [
+        [(index[neighbor], _edge_weight(edge_data, consider_road_condition, condition_weight))
+         for neighbor, edge_data in graph[node].items()]
+        for node in nodes
+    ]
+    return nodes, index, adjacency
+
+def _dijkstra_step(
+    adjacency: List[List[Tuple[int, float]]],
+    pq: List[Tuple[float, int]],
+    distances: List[float],
+    previous: List[int],
+    other_distances: List[float],
+    best_distance: float
+) -> Optional[Tuple[float, Tuple[int, int]]]:
+    """
+    Settle the closest frontier node of one search direction.
+    
+    Args:
+        adjacency: Weighted adjacency lists (undirected, so both directions share them)
+        pq: Priority queue of this direction
+        distances: Tentative distances of this direction
+        previous: Predecessor indices of this direction (-1 = none)
+        other_distances: Tentative distances of the opposite direction
+        best_distance: Shortest complete path length found so far
+    
+    Returns:
+        (distance, (node on this side, node on other side)) for a shorter
+        complete path through the settled node, or None
+    """
+    best = None
+    current_distance, current = heapq.heappop(pq)
+    if current_distance > distances[current]:
+        return best
+    
+    for neighbor, weight in adjacency[current]:
+        distance = current_distance + weight
+        
+        if distance < distances[neighbor]:
+            distances[neighbor] = distance
+            previous[neighbor] = current
+            heapq.heappush(pq, (distance, neighbor))
+        
+        # A path through this edge joins the two searches
+        total = distance + other_distances[neighbor]
+        if total < best_distance:
+            best_distance = total
+            best = (total, (current, neighbor))
+    
+    return best
+
 def dijkstra_shortest_path(
     graph: nx.Graph,
     start: str,
     end: str,
     consider_road_condition: bool = False,
-    condition_weight: float = 0.3
+    condition_weight: float = 0.3,
+    graph_index: Optional[GraphIndex] = None
 ) -> Tuple[List[str], float]:
     """
-    Basic Dijkstra's algorithm for finding shortest path based on distance.
+    Bidirectional Dijkstra's algorithm for finding shortest path based on distance.
+    
+    Searches forward from start and backward from end at the same time and
+    stops once the two frontiers cannot improve the best meeting point.
     
     Args:
         graph: NetworkX graph
@@ -20,50 +122,251 @@ def dijkstra_shortest_path(
         end: Destination node ID
         consider_road_condition: Whether to factor in road conditions
         condition_weight: Weight factor for road conditions (0-1)
+        graph_index: Prebuilt build_graph_index result for this graph; its
+            weights override the condition options
+    
+    Returns:
+        Tuple[List[str], float]: Path and total distance (empty path and
+        infinity if no path exists)
+    """
+    if start not in graph or end not in graph:
+        return [], float('infinity')
+    if start == end:
+        return [start], 0
+    
+    if graph_index is None:
+        graph_index = build_graph_index(graph, consider_road_condition, condition_weight)
+    nodes, index, adjacency = graph_index
+    start_idx, end_idx = index[start], index[end]
+    
+    # Flat per-index tables for both directions
+    forward_distances = [float('infinity')] * len(nodes)
+    backward_distances = [float('infinity')] * len(nodes)
+    forward_previous = [-1] * len(nodes)
+    backward_previous = [-1] * len(nodes)
+    forward_distances[start_idx] = 0
+    backward_distances[end_idx] = 0
+    forward_pq = [(0, start_idx)]
+    backward_pq = [(0, end_idx)]
+    total_distance = float('infinity')
+    meeting_edge = None
+    
+    while forward_pq and backward_pq:
+        # No remaining pair of frontier nodes can beat the best meeting point
+        if forward_pq[0][0] + backward_pq[0][0] >= total_distance:
+            break
+        
+        # Expand the direction with the closer frontier
+        if forward_pq[0][0] <= backward_pq[0][0]:
+            meeting = _dijkstra_step(
+                adjacency, forward_pq, forward_distances, forward_previous,
+                backward_distances, total_distance
+            )
+            if meeting:
+                total_distance, meeting_edge = meeting
+        else:
+            meeting = _dijkstra_step(
+                adjacency, backward_pq, backward_distances, backward_previous,
+                forward_distances, total_distance
+            )
+            if meeting:
+                total_distance, (backward_node, forward_node) = meeting
+                meeting_edge = (forward_node, backward_node)
+    
+    if meeting_edge is None:
+        return [], float('infinity')
+    
+    # Reconstruct path: start -> forward meeting node, then backward node -> end
+    forward_node, backward_node = meeting_edge
+    path = []
+    current = forward_node
+    while current != -1:
+        path.append(nodes[current])
+        current = forward_previous[current]
+    path.reverse()
+    
+    current = backward_node
+    while current != -1:
+        path.append(nodes[current])
+        current = backward_previous[current]
+    
+    return path, total_distance
+
+def dijkstra_single_source(
+    graph_index: GraphIndex,
+    start: str,
+    targets: Optional[List[str]] = None
+) -> Tuple[List[float], List[int]]:
+    """
+    One-to-many Dijkstra over a prebuilt graph index.
+    
+    Args:
+        graph_index: build_graph_index result
+        start: Starting node ID
+        targets: Node IDs to settle; the search stops once all of them are
+            settled (None explores the whole component)
     
     Returns:
-        Tuple[List[str], float]: Path and total distance
+        Tuple[List[float], List[int]]: Per-index distances and predecessor
+        indices (-1 = none); final for start and every settled target
     """
-    distances = {node: float('infinity') for node in graph.nodes()}
-    distances[start] = 0
-    pq = [(0, start)]
-    previous = {node: None for node in graph.nodes()}
+    nodes, index, adjacency = graph_index
+    start_idx = index[start]
+    distances = [float('infinity')] * len(nodes)
+    previous = [-1] * len(nodes)
+    distances[start_idx] = 0
+    pq = [(0, start_idx)]
+    
+    remaining = None
+    if targets is not None:
+        remaining = {index[target] for target in targets if target in index}
     
     while pq:
         current_distance, current = heapq.heappop(pq)
-        
-        if current == end:
-            break
-            
         if current_distance > distances[current]:
             continue
-            
-        for neighbor in graph.neighbors(current):
-            edge_data = graph[current][neighbor]
-            
-            # Calculate weight based on distance and optionally road condition
-            weight = edge_data.get('weight', 1.0)  # Base distance
-            if consider_road_condition:
-                condition = edge_data.get('condition', 10)
-                condition_factor = (11 - condition) * condition_weight
-                weight *= (1 + condition_factor)
-            
-            distance = distances[current] + weight
-            
+        
+        if remaining is not None:
+            remaining.discard(current)
+            if not remaining:
+                break
+        
+        for neighbor, weight in adjacency[current]:
+            distance = current_distance + weight
             if distance < distances[neighbor]:
                 distances[neighbor] = distance
                 previous[neighbor] = current
                 heapq.heappush(pq, (distance, neighbor))
     
-    # Reconstruct path
-    path = []
-    current = end
-    while current is not None:
-        path.append(current)
-        current = previous[current]
-    path.reverse()
+    return distances, previous
+
+# Batches with at least this many distinct sources contract degree-2 chains first
+CHAIN_CONTRACTION_MIN_SOURCES = 8
+
+def contract_chains(
+    graph_index: GraphIndex,
+    keep: List[str]
+) -> Tuple[GraphIndex, Dict[Tuple[int, int], List[str]]]:
+    """
+    Collapse chains of degree-2 nodes into single weighted edges.
+    
+    Road segments between intersections pass through many degree-2 nodes;
+    any shortest path entering such a chain must run along all of it, so the
+    chain can be replaced by one edge carrying its summed weight.
+    
+    Args:
+        graph_index: build_graph_index result
+        keep: Node IDs that must stay in the contracted graph (query endpoints)
+    
+    Returns:
+        Tuple of the contracted GraphIndex and a dict mapping each contracted
+        edge (u index, v index) to the node IDs it skips, in order from u to v
+    """
+    nodes, index, adjacency = graph_index
+    keep_indices = {index[node] for node in keep if node in index}
+    removable = [
+        len(neighbors) == 2 and i not in keep_indices
+        for i, neighbors in enumerate(adjacency)
+    ]
+    
+    kept = [i for i in range(len(nodes)) if not removable[i]]
+    new_index = {old: new for new, old in enumerate(kept)}
+    best = {}
+    
+    for u in kept:
+        for neighbor, weight in adjacency[u]:
+            # Walk the chain until it reaches a kept node
+            previous, current, total, skipped = u, neighbor, weight, []
+            while removable[current]:
+                skipped.append(current)
+                (a, a_weight), (b, b_weight) = adjacency[current]
+                if a == previous:
+                    previous, current, total = current, b, total + b_weight
+                else:
+                    previous, current, total = current, a, total + a_weight
+            if current == u:
+                continue
+            
+            # Keep the lightest of parallel chains between the same nodes
+            key = (new_index[u], new_index[current])
+            if key not in best or total < best[key][0]:
+                best[key] = (total, skipped)
+    
+    new_adjacency = [[] for _ in kept]
+    chains = {}
+    for (u, v), (total, skipped) in best.items():
+        new_adjacency[u].append((v, total))
+        chains[(u, v)] = [nodes[i] for i in skipped]
+    
+    new_nodes = [nodes[i] for i in kept]
+    return (new_nodes, {node: i for i, node in enumerate(new_nodes)}, new_adjacency), chains
+
+def run_dijkstra_batch(
+    queries: List[Tuple[str, str]],
+    scenario: Optional[str] = None,
+    consider_road_condition: bool = False,
+    condition_weight: float = 0.3
+) -> Dict[Tuple[str, str], Tuple[List[str], float]]:
+    """
+    Answer several shortest-path queries on one graph build.
+    
+    Data loading, graph construction and weight precomputation are shared by
+    all queries, and each distinct source runs a single one-to-many search.
+    Batches with many sources first contract degree-2 chains away from the
+    query endpoints, which pays off once it is reused by enough searches.
+    
+    Args:
+        queries: (source, destination) ID pairs
+        scenario: Optional scenario (e.g., road closures)
+        consider_road_condition: Whether to factor in road conditions
+        condition_weight: Weight factor for road conditions
+    
+    Returns:
+        Dict mapping each query to its (path, total distance); unreachable or
+        unknown endpoints give an empty path and infinity
+    """
+    neighborhoods, roads, facilities, traffic_lights = load_data()
+    _, _, _, graph = build_map(neighborhoods, roads, facilities, scenario)
+    graph_index = build_graph_index(graph, consider_road_condition, condition_weight)
+    
+    # Group destinations by source
+    targets_by_source = {}
+    for source, dest in queries:
+        targets_by_source.setdefault(source, []).append(dest)
+    
+    chains = {}
+    if len(targets_by_source) >= CHAIN_CONTRACTION_MIN_SOURCES:
+        endpoints = [node for query in queries for node in query]
+        graph_index, chains = contract_chains(graph_index, endpoints)
+    nodes, index, _ = graph_index
+    
+    results = {}
+    for source, targets in targets_by_source.items():
+        if source not in index:
+            for dest in targets:
+                results[(source, dest)] = ([], float('infinity'))
+            continue
+        
+        distances, previous = dijkstra_single_source(graph_index, source, targets)
+        for dest in targets:
+            dest_idx = index.get(dest)
+            if dest_idx is None or distances[dest_idx] == float('infinity'):
+                results[(source, dest)] = ([], float('infinity'))
+                continue
+            
+            # Walk predecessors back to the source, expanding contracted chains
+            path = []
+            current = dest_idx
+            while current != -1:
+                path.append(nodes[current])
+                parent = previous[current]
+                if (parent, current) in chains:
+                    path.extend(reversed(chains[(parent, current)]))
+                current = parent
+            path.reverse()
+            results[(source, dest)] = (path, distances[dest_idx])
     
-    return path, distances[end] if end in distances else float('infinity')
+    return results
 
 def run_dijkstra(
     source: str,
@@ -89,9 +392,10 @@ def run_dijkstra(
     neighborhoods, roads, facilities, traffic_lights = load_data()
     m, node_positions, _, graph = build_map(neighborhoods, roads, facilities, scenario)
     
-    # Run the algorithm
+    # Compute each road's weight once, then run the algorithm
+    graph_index = build_graph_index(graph, consider_road_condition, condition_weight)
     path, total_distance = dijkstra_shortest_path(
-        graph, source, dest, consider_road_condition, condition_weight
+        graph, source, dest, graph_index=graph_index
     )
     
     results = {
@@ -1,15 +1,137 @@
+import sys
 import pandas as pd
+import numpy as np
 import networkx as nx
 import folium
 from utils.helpers import load_data, build_map, load_transit_data, simple_shortest_path_length
 from typing import Dict, List, Tuple, Any
-from collections import defaultdict
+from collections import defaultdict, Counter
+from functools import lru_cache
+
+@lru_cache(maxsize=None)
+def _parse_stops(stops_str: str) -> Tuple[str, ...]:
+    """
+    Split a comma-separated stops/stations string into cleaned stop IDs.
+    
+    Results are memoized, so each route string is only split once no matter
+    how many optimizer passes read it. IDs are interned to match valid_nodes.
+    
+    Args:
+        stops_str: Comma-separated stop IDs as stored in the route data
+        
+    Returns:
+        Tuple of stripped stop IDs
+    """
+    return tuple(sys.intern(s.strip()) for s in stops_str.split(','))
+
+def _dp_allocate_kernel(
+    values: np.ndarray,
+    max_units: int,
+    min_units: int,
+    max_per_route: int
+) -> np.ndarray:
+    """
+    Array kernel for the resource allocation knapsack.
+    
+    Fills the DP table one route at a time: every (unit budget, allocation)
+    candidate of a row is formed from a precomputed gains vector and reduced
+    with a single vectorized max, then the recorded choices are backtracked.
+    
+    Args:
+        values: Per-route value array (float64)
+        max_units: Total units available
+        min_units: Minimum units for a route that receives any
+        max_per_route: Maximum units per route
+        
+    Returns:
+        Integer array with the units assigned to each route
+    """
+    n = len(values)
+    dp = np.zeros((n + 1, max_units + 1))
+    # choice[i, u]: units given to route i in the optimum for u units (0 = none)
+    choice = np.zeros((n + 1, max_units + 1), dtype=np.int64)
+    
+    # Allocation sizes a route can take (0 is handled as "no allocation")
+    top_alloc = min(max_units, max_per_route)
+    allocs = np.arange(min_units, top_alloc + 1)
+    # Diminishing returns: a route's gain scales with min(alloc, 10)
+    gain_factor = np.minimum(allocs, 10)
+    # Column j of a window over the padded previous row holds prev[u - (top_alloc - j)]
+    alloc_cols = top_alloc - allocs
+    padding = np.full(top_alloc, -np.inf)
+    
+    # Build DP table
+    for i in range(1, n + 1):
+        prev_row = dp[i-1]
+        if len(allocs) == 0:
+            dp[i] = prev_row
+            continue
+        
+        # gains[k] is the value of giving allocs[k] units to this route
+        gains = values[i-1] * gain_factor
+        
+        # candidates[u, k] = prev_row[u - allocs[k]] + gains[k] (-inf if allocs[k] > u)
+        windows = np.lib.stride_tricks.sliding_window_view(
+            np.concatenate((padding, prev_row)), top_alloc + 1
+        )
+        candidates = windows[:, alloc_cols] + gains
+        best = candidates.max(axis=1)
+        
+        # On equal totals prefer the allocation that contributes more value to
+        # this route, then the smallest such allocation
+        tied_gains = np.where(candidates == best[:, None], gains, -np.inf)
+        best_idx = tied_gains.argmax(axis=1)
+        best_gain = gains[best_idx]
+        
+        # Keep the previous row's value (no allocation) unless an allocation beats it
+        take = (best > prev_row) | ((best == prev_row) & (best_gain > 0))
+        dp[i] = np.where(take, best, prev_row)
+        choice[i] = np.where(take, allocs[best_idx], 0)
+    
+    # Backtrack through the recorded choices
+    route_allocs = np.zeros(n, dtype=np.int64)
+    remaining = max_units
+    for i in range(n, 0, -1):
+        alloc = int(choice[i, remaining])
+        
+        if alloc == 0 and remaining >= min_units:
+            # Route was left out of the optimum; still honour the minimum
+            alloc = min_units
+        
+        route_allocs[i-1] = alloc
+        remaining -= alloc
+    
+    return route_allocs
 
 class PublicTransitOptimizer:
     """
     Optimizes public transit schedules using dynamic programming.
     Handles bus routes, metro lines, and transfer points.
     """
+    # Base road network shared by all instances (loaded on first use)
+    _base_network = None
+    
+    @classmethod
+    def _load_base_network(cls) -> Tuple[Any, ...]:
+        """
+        Load the city data and build the base road network once per process.
+        
+        Returns:
+            Tuple of (neighborhoods, roads, facilities, traffic_lights,
+            base_map, node_positions, base_graph). Shared between instances,
+            so callers must treat it as read-only.
+        """
+        if cls._base_network is None:
+            neighborhoods, roads, facilities, traffic_lights = load_data()
+            base_map, node_positions, _, base_graph = build_map(
+                neighborhoods, roads, facilities
+            )
+            cls._base_network = (
+                neighborhoods, roads, facilities, traffic_lights,
+                base_map, node_positions, base_graph
+            )
+        return cls._base_network
+    
     def __init__(self, bus_routes: pd.DataFrame = None, metro_lines: pd.DataFrame = None, demand_data: Dict = None):
         """
         Initialize the optimizer with transit data.
@@ -19,20 +141,32 @@ class PublicTransitOptimizer:
             metro_lines: DataFrame containing metro line information
             demand_data: Dictionary mapping (from_id, to_id) to daily passenger count
         """
-        # Load base network data
-        self.neighborhoods, self.roads, self.facilities, self.traffic_lights = load_data()
-        self.base_map, self.node_positions, _, self.base_graph = build_map(
-            self.neighborhoods, self.roads, self.facilities
-        )
+        # Load base network data (cached across instances)
+        (self.neighborhoods, self.roads, self.facilities, self.traffic_lights,
+         self.base_map, self.node_positions, self.base_graph) = self._load_base_network()
+        
+        # Node coordinates as an array for vectorized distance computations
+        self._position_index = {node: i for i, node in enumerate(self.node_positions)}
+        self._position_array = np.array(list(self.node_positions.values()), dtype=np.float64)
         
         # Create set of valid nodes from neighborhoods and facilities
-        self.valid_nodes = set(str(row["ID"]).strip() for _, row in self.neighborhoods.iterrows())
-        self.valid_nodes.update(str(row["ID"]).strip() for _, row in self.facilities.iterrows())
+        # (interned, so lookups of parsed stop IDs can short-circuit on identity)
+        node_ids = pd.concat([self.neighborhoods["ID"], self.facilities["ID"]]).astype(str).str.strip()
+        self.valid_nodes = frozenset(sys.intern(node_id) for node_id in node_ids)
         
         # Load transit data if not provided
         if bus_routes is None or metro_lines is None or demand_data is None:
             try:
-                self.bus_routes, self.metro_lines, self.demand_data, self.transfer_points = load_transit_data(self.valid_nodes)
+                self.bus_routes, self.metro_lines, self.demand_data, transfer_points = load_transit_data(self.valid_nodes)
+                self.transfer_points = frozenset(transfer_points)
+                
+                # Parse stops/stations once; later passes read these columns
+                self.bus_routes['_stops_list'] = [list(_parse_stops(stops)) for stops in self.bus_routes['Stops']]
+                self.metro_lines['_stations_list'] = [list(_parse_stops(stations)) for stations in self.metro_lines['Stations']]
+                
+                # Repeated route/line IDs are stored as categoricals
+                self.bus_routes['RouteID'] = self.bus_routes['RouteID'].astype('category')
+                self.metro_lines['LineID'] = self.metro_lines['LineID'].astype('category')
             except Exception as e:
                 raise Exception(f"Failed to load transit data: {str(e)}")
         else:
@@ -43,12 +177,23 @@ class PublicTransitOptimizer:
                 (str(k[0]).strip(), str(k[1]).strip()): int(v)
                 for k, v in demand_data.items()
             }
-            self.transfer_points = set()
+            self.transfer_points = frozenset()
             self._identify_transfer_points()
         
         # Initialize the network graph
         self.network = nx.MultiGraph()
         
+        # Demand matrix is (re)built together with the integrated network
+        self._node_index = {}
+        self._demand_series = None
+        self._demand_matrix = None
+        self._halved_demand = None
+        self._transfer_mask = None
+        self._transfer_mask_points = None
+        
+        # Road distances between consecutive bus stops, keyed by unordered pair
+        self._pair_dist = {}
+        
     def _validate_routes(self, routes: pd.DataFrame, route_type: str) -> pd.DataFrame:
         """
         Validate and clean route data.
@@ -58,62 +203,69 @@ class PublicTransitOptimizer:
             route_type: Type of route ('bus' or 'metro')
             
         Returns:
-            DataFrame containing validated routes
+            DataFrame containing validated routes, with the parsed valid stops
+            kept in a '_stops_list' (bus) or '_stations_list' (metro) column
         """
         valid_routes = []
-        for _, route in routes.iterrows():
+        stops_col = 'Stations' if route_type == 'metro' else 'Stops'
+        list_col = '_stations_list' if route_type == 'metro' else '_stops_list'
+        columns = list(routes.columns)
+        if stops_col not in columns:
+            return pd.DataFrame(valid_routes)
+        stops_idx = columns.index(stops_col)
+        
+        for row in routes.itertuples(index=False, name=None):
             try:
                 # Get stops/stations and clean IDs
-                stops_col = 'Stations' if route_type == 'metro' else 'Stops'
-                stops = [str(s).strip() for s in str(route[stops_col]).split(',')]
+                stops = _parse_stops(str(row[stops_idx]))
                 
                 # Filter valid stops
                 valid_stops = [stop for stop in stops if stop in self.valid_nodes]
                 
                 if len(valid_stops) >= 2:  # Only keep routes with at least 2 valid stops
-                    route_dict = route.to_dict()
+                    route_dict = dict(zip(columns, row))
                     route_dict[stops_col] = ','.join(valid_stops)
                     # Clean string values
                     for key in route_dict:
                         if isinstance(route_dict[key], str):
                             route_dict[key] = route_dict[key].strip()
+                    route_dict[list_col] = valid_stops
                     valid_routes.append(route_dict)
             except Exception:
                 continue
-                
-        return pd.DataFrame(valid_routes)
         
-    def _identify_transfer_points(self):
-        """Find intersections between bus and metro networks."""
-        bus_stops = set()
-        metro_stations = set()
+        validated = pd.DataFrame(valid_routes)
         
-        # Collect bus stops
-        for _, route in self.bus_routes.iterrows():
-            stops = [str(s.strip()) for s in route['Stops'].split(',')]
-            bus_stops.update(stop for stop in stops if stop in self.valid_nodes)
+        # Repeated route/line IDs are stored as categoricals
+        id_col = 'LineID' if route_type == 'metro' else 'RouteID'
+        if id_col in validated.columns:
+            validated[id_col] = validated[id_col].astype('category')
         
-        # Collect metro stations
-        for _, line in self.metro_lines.iterrows():
-            stations = [str(s.strip()) for s in line['Stations'].split(',')]
-            metro_stations.update(station for station in stations if station in self.valid_nodes)
+        return validated
         
-        # Find intersections
-        self.transfer_points = bus_stops.intersection(metro_stations)
+    def _identify_transfer_points(self):
+        """Find intersections between bus and metro networks."""
+        # Union the already-parsed stop lists of each mode
+        bus_stops = set().union(*self.bus_routes['_stops_list'])
+        metro_stations = set().union(*self.metro_lines['_stations_list'])
+        
+        # Find intersections (restricted to known nodes)
+        self.transfer_points = frozenset(bus_stops & metro_stations & self.valid_nodes)
     
     def build_integrated_network(self):
         """Build a multimodal transportation network."""
         # Start with the base road network, ensuring string IDs
         self.network = nx.Graph()
         
-        # Add base graph edges
-        for u, v, data in self.base_graph.edges(data=True):
-            self.network.add_edge(str(u), str(v), **data)
+        # Add base graph edges in one batch (attribute dicts are copied)
+        self.network.add_edges_from(
+            (str(u), str(v), data) for u, v, data in self.base_graph.edges(data=True)
+        )
         
-        # Add bus routes
-        for _, route in self.bus_routes.iterrows():
-            stops = [str(s.strip()) for s in route['Stops'].split(',')]
-            
+        # Collect bus route edges and add them in one batch
+        bus_edges = []
+        bus_rows = self.bus_routes[['RouteID', '_stops_list', 'DailyPassengers']]
+        for route_id, stops, daily_passengers in bus_rows.itertuples(index=False, name=None):
             for i in range(len(stops)-1):
                 # Skip if either stop is not in valid nodes
                 if stops[i] not in self.valid_nodes or stops[i+1] not in self.valid_nodes:
@@ -124,50 +276,119 @@ class PublicTransitOptimizer:
                 end_pos = self.node_positions.get(stops[i+1])
                 
                 if start_pos and end_pos:
-                    try:
-                        # Calculate distance using existing road network if possible
-                        distance = simple_shortest_path_length(self.base_graph, stops[i], stops[i+1], weight='weight')
+                    # Road distances are memoized per unordered stop pair
+                    pair = frozenset((stops[i], stops[i+1]))
+                    if pair in self._pair_dist:
+                        distance = self._pair_dist[pair]
+                    else:
+                        try:
+                            # Calculate distance using existing road network if possible
+                            distance = simple_shortest_path_length(self.base_graph, stops[i], stops[i+1], weight='weight')
+                        except Exception:
+                            distance = None
+                        self._pair_dist[pair] = distance
                     
-                    except Exception:
+                    if distance is None:
                         # If no road path exists, use direct distance
                         distance = ((start_pos[0] - end_pos[0])**2 + 
                                   (start_pos[1] - end_pos[1])**2)**0.5
                     
-                    self.network.add_edge(
-                        stops[i],
-                        stops[i+1],
-                        type='bus',
-                        route=route['RouteID'],
-                        weight=distance,
-                        capacity=route['DailyPassengers']
-                    )
-        
-        # Add metro lines
-        for _, line in self.metro_lines.iterrows():
-            stations = [str(s.strip()) for s in line['Stations'].split(',')]
-            
+                    bus_edges.append((stops[i], stops[i+1], {
+                        'type': 'bus',
+                        'route': route_id,
+                        'weight': distance,
+                        'capacity': daily_passengers
+                    }))
+        self.network.add_edges_from(bus_edges)
+        
+        # Collect metro line segments between valid, positioned stations
+        metro_segments = []
+        metro_rows = self.metro_lines[['LineID', '_stations_list', 'DailyPassengers']]
+        for line_id, stations, daily_passengers in metro_rows.itertuples(index=False, name=None):
             for i in range(len(stations)-1):
-                # Skip if either station is not in valid nodes
+                # Skip if either station is not in valid nodes or has no coordinates
                 if stations[i] not in self.valid_nodes or stations[i+1] not in self.valid_nodes:
                     continue
-                
-                # Get coordinates for visualization
-                start_pos = self.node_positions.get(stations[i])
-                end_pos = self.node_positions.get(stations[i+1])
-                
-                if start_pos and end_pos:
-                    # Calculate direct distance for metro (doesn't follow roads)
-                    distance = ((start_pos[0] - end_pos[0])**2 + 
-                              (start_pos[1] - end_pos[1])**2)**0.5
-                    
-                    self.network.add_edge(
-                        stations[i],
-                        stations[i+1],
-                        type='metro',
-                        route=line['LineID'],
-                        weight=distance,
-                        capacity=line['DailyPassengers']
-                    )
+                if stations[i] not in self._position_index or stations[i+1] not in self._position_index:
+                    continue
+                metro_segments.append((stations[i], stations[i+1], line_id, daily_passengers))
+        
+        # Direct distances for metro (doesn't follow roads) in one vector op
+        metro_edges = []
+        if metro_segments:
+            start_pos = self._position_array[[self._position_index[seg[0]] for seg in metro_segments]]
+            end_pos = self._position_array[[self._position_index[seg[1]] for seg in metro_segments]]
+            distances = np.sqrt(((start_pos - end_pos) ** 2).sum(axis=1))
+            metro_edges = [
+                (start, end, {
+                    'type': 'metro',
+                    'route': line_id,
+                    'weight': float(distance),
+                    'capacity': daily_passengers
+                })
+                for (start, end, line_id, daily_passengers), distance in zip(metro_segments, distances)
+            ]
+        self.network.add_edges_from(metro_edges)
+        
+        # Pack demand into an origin-destination matrix over the new network
+        self._build_demand_matrix()
+    
+    def _build_demand_matrix(self):
+        """
+        Map node IDs to integer indices and store the demand dictionary as a
+        dense origin-destination matrix for vectorized lookups.
+        
+        Network nodes come first in the index, followed by any route stops
+        that are not part of the network.
+        """
+        node_ids = list(self.network.nodes())
+        known = set(node_ids)
+        for stops in pd.concat([self.bus_routes['_stops_list'], self.metro_lines['_stations_list']]):
+            for stop in stops:
+                if stop not in known:
+                    known.add(stop)
+                    node_ids.append(stop)
+        
+        self._node_index = {node: i for i, node in enumerate(node_ids)}
+        self._demand_matrix = np.zeros((len(node_ids), len(node_ids)), dtype=np.int64)
+        
+        # Demand as an int64 Series keyed by (src, dst) for batch lookups
+        self._demand_series = pd.Series(
+            list(self.demand_data.values()),
+            index=pd.MultiIndex.from_tuples(list(self.demand_data.keys()), names=['src', 'dst']),
+            dtype=np.int64
+        )
+        
+        # Resolve both ends to matrix indices in one pass (-1 = unknown node)
+        node_lookup = pd.Index(node_ids)
+        rows = node_lookup.get_indexer(self._demand_series.index.get_level_values('src'))
+        cols = node_lookup.get_indexer(self._demand_series.index.get_level_values('dst'))
+        known_pairs = (rows >= 0) & (cols >= 0)
+        self._demand_matrix[rows[known_pairs], cols[known_pairs]] = self._demand_series.to_numpy()[known_pairs]
+        
+        # Per-pair route value uses halved demand; keep it alongside the matrix
+        self._halved_demand = self._demand_matrix // 2
+        
+        # Transfer-point mask over the node index is rebuilt on next use
+        self._transfer_mask = None
+        self._transfer_mask_points = None
+    
+    def _get_transfer_mask(self) -> np.ndarray:
+        """
+        Boolean mask over the integer node index marking transfer points.
+        
+        Cached until the node index is rebuilt or transfer_points is replaced.
+        
+        Returns:
+            Array of length len(self._node_index)
+        """
+        if self._transfer_mask is None or self._transfer_mask_points is not self.transfer_points:
+            mask = np.zeros(len(self._node_index), dtype=bool)
+            mask[[self._node_index[point] for point in self.transfer_points
+                  if point in self._node_index]] = True
+            self._transfer_mask = mask
+            self._transfer_mask_points = self.transfer_points
+        return self._transfer_mask
     
     def optimize_transfer_points(self) -> List[Tuple[str, float]]:
         """
@@ -176,26 +397,35 @@ class PublicTransitOptimizer:
         Returns:
             List of tuples (point_id, score) sorted by score in descending order
         """
+        if self._demand_matrix is None:
+            self._build_demand_matrix()
+        
         transfer_scores = []
+        adjacency = self.network.adj
+        
+        # Look up all transfer-point degrees in one pass
+        degrees = dict(self.network.degree(self.transfer_points))
+        
+        # Demand into/out of every node from/to network nodes (the first rows/columns)
+        num_network_nodes = self.network.number_of_nodes()
+        demand_in_totals = self._demand_matrix[:num_network_nodes, :].sum(axis=0)
+        demand_out_totals = self._demand_matrix[:, :num_network_nodes].sum(axis=1)
         
         for point in self.transfer_points:
             # Calculate connectivity score
-            degree = self.network.degree(point)
+            degree = degrees[point]
             
             # Calculate demand score
-            demand_in = sum(self.demand_data.get((src, point), 0) 
-                          for src in self.network.nodes())
-            demand_out = sum(self.demand_data.get((point, dest), 0) 
-                           for dest in self.network.nodes())
+            point_idx = self._node_index[point]
+            demand_in = int(demand_in_totals[point_idx])
+            demand_out = int(demand_out_totals[point_idx])
             
-            # Calculate transfer efficiency
-            transfer_efficiency = 0
-            neighbors = list(self.network.neighbors(point))
-            for i in range(len(neighbors)):
-                for j in range(i+1, len(neighbors)):
-                    if (self.network[point][neighbors[i]].get('type') != 
-                        self.network[point][neighbors[j]].get('type')):
-                        transfer_efficiency += 1
+            # Transfer efficiency: number of incident edge pairs with different types,
+            # i.e. (total^2 - sum of squared per-type counts) / 2
+            type_counts = Counter(data.get('type') for data in adjacency[point].values())
+            total_edges = sum(type_counts.values())
+            transfer_efficiency = (total_edges * total_edges - 
+                                   sum(count * count for count in type_counts.values())) // 2
             
             # Calculate final score
             score = (0.4 * degree + 
@@ -215,84 +445,86 @@ class PublicTransitOptimizer:
     ) -> Dict[str, int]:
         """Optimize resource allocation using dynamic programming."""
         n = len(values)
-        dp = [[0] * (max_units + 1) for _ in range(n + 1)]
+        
+        # Not enough units to give any route its minimum
+        if max_units < min_units:
+            return {route_id: 0 for route_id, _ in values}
+        
+        # Units beyond this level add no value (diminishing returns cap at 10)
+        useful_max = max(min_units, min(max_per_route, 10))
+        
+        # Enough units to saturate every route: the DP result is forced
+        if (max_units - n * min_units >= n * (useful_max - min_units)
+                and all(value > 0 for _, value in values)):
+            return {route_id: useful_max for route_id, _ in values}
+        
+        route_values = np.array([value for _, value in values], dtype=np.float64)
+        route_allocs = _dp_allocate_kernel(route_values, max_units, min_units, max_per_route)
+        
+        # Map array positions back to route IDs (same order as the backtrack)
         allocation = {}
-
-        # Build DP table
-        for i in range(1, n + 1):
-            route_id, value = values[i-1]
-            for u in range(max_units + 1):
-                # Start with previous row's value (no allocation to this route)
-                dp[i][u] = dp[i-1][u]
-                
-                # Try different allocations
-                for alloc in range(min_units, min(u + 1, max_per_route + 1)):
-                    # Apply diminishing returns
-                    current_value = value * min(alloc, 10)
-                    if u >= alloc and dp[i-1][u-alloc] + current_value > dp[i][u]:
-                        dp[i][u] = dp[i-1][u-alloc] + current_value
-
-        # Backtrack to find allocation
-        remaining = max_units
-        total_allocated = 0
-        
-        for i in range(n, 0, -1):
-            route_id, value = values[i-1]
-            best_alloc = 0
-            best_value = 0
-            
-            # Find the allocation that led to the optimal solution
-            for alloc in range(min_units, min(remaining + 1, max_per_route + 1)):
-                if remaining >= alloc:
-                    current_value = value * min(alloc, 10)
-                    if dp[i-1][remaining-alloc] + current_value == dp[i][remaining]:
-                        if current_value > best_value:
-                            best_value = current_value
-                            best_alloc = alloc
-            
-            if best_alloc > 0:
-                allocation[route_id] = best_alloc
-                remaining -= best_alloc
-                total_allocated += best_alloc
-            else:
-                # If no allocation was found but we have minimum requirements
-                # Only allocate if we have enough remaining units
-                if remaining >= min_units:
-                    allocation[route_id] = min_units
-                    remaining -= min_units
-                    total_allocated += min_units
-                else:
-                    # Not enough remaining units for minimum allocation
-                    allocation[route_id] = 0
-        
-        # Verify we didn't exceed the maximum units
-        if total_allocated > max_units:
-            # If we somehow exceeded the allocation, scale everything down
-            total = sum(allocation.values())
-            for route_id in allocation:
-                allocation[route_id] = int((allocation[route_id] * max_units) / total)
-                
-            # Distribute any remaining units (due to rounding)
-            remaining = max_units - sum(allocation.values())
-            
-            # Create a mapping from route_id to its index in values
-            route_indices = {rid: i for i, (rid, _) in enumerate(values)}
+        for i in range(n - 1, -1, -1):
+            allocation[values[i][0]] = int(route_allocs[i])
+        
+        return allocation
+    
+    def _compute_route_values(
+        self,
+        routes: pd.DataFrame,
+        id_col: str,
+        stops_col: str
+    ) -> List[Tuple[str, float]]:
+        """
+        Score each route by ridership, served demand and transfer connectivity.
+        
+        Args:
+            routes: DataFrame of bus routes or metro lines
+            id_col: Column holding the route/line ID
+            stops_col: Column holding the parsed stop/station lists
             
-            # Sort routes by their value
-            sorted_routes = sorted(
-                allocation.items(), 
-                key=lambda x: values[route_indices.get(x[0], 0)][1] if x[0] in route_indices else 0, 
-                reverse=True
+        Returns:
+            List of (route_id, value) tuples in DataFrame order
+        """
+        if self._demand_matrix is None:
+            self._build_demand_matrix()
+        
+        num_routes = len(routes)
+        num_nodes = len(self._node_index)
+        
+        # Flatten every route's stops into (route position, node index) arrays
+        stop_ids = [
+            np.fromiter((self._node_index[stop] for stop in stops), dtype=np.intp, count=len(stops))
+            for stops in routes[stops_col]
+        ]
+        route_pos = np.repeat(np.arange(num_routes), [len(ids) for ids in stop_ids])
+        all_stop_ids = np.concatenate(stop_ids) if stop_ids else np.zeros(0, dtype=np.intp)
+        
+        # Value from demand matrix: halved demand of every downstream stop pair
+        pair_routes, pair_src, pair_dst = [], [], []
+        for pos, ids in enumerate(stop_ids):
+            upper_i, upper_j = np.triu_indices(len(ids), 1)
+            pair_routes.append(np.full(len(upper_i), pos))
+            pair_src.append(ids[upper_i])
+            pair_dst.append(ids[upper_j])
+        route_demand = np.zeros(num_routes, dtype=np.int64)
+        if pair_routes:
+            np.add.at(
+                route_demand,
+                np.concatenate(pair_routes),
+                self._halved_demand[np.concatenate(pair_src), np.concatenate(pair_dst)]
             )
-            
-            for route_id, _ in sorted_routes:
-                if remaining <= 0:
-                    break
-                if allocation[route_id] < max_per_route:
-                    allocation[route_id] += 1
-                    remaining -= 1
-
-        return allocation
+        
+        # Transfer point bonus: distinct transfer points served by each route
+        is_transfer = self._get_transfer_mask()
+        served = np.unique(route_pos * num_nodes + all_stop_ids)
+        served_transfers = served[is_transfer[served % num_nodes]]
+        transfer_counts = np.bincount(served_transfers // num_nodes, minlength=num_routes)
+        
+        # Base value from existing passengers plus the two bonuses
+        route_values = (routes['DailyPassengers'].to_numpy() + route_demand 
+                        + 10000 * transfer_counts)
+        
+        return list(zip(routes[id_col].tolist(), route_values.tolist()))
     
     def optimize_resource_allocation(
         self,
@@ -301,44 +533,8 @@ class PublicTransitOptimizer:
     ) -> Tuple[Dict[str, int], Dict[str, int]]:
         """Optimize allocation of buses and trains."""
         # Calculate route values
-        bus_values = []
-        for _, route in self.bus_routes.iterrows():
-            stops = [s.strip() for s in route['Stops'].split(',')]
-            
-            # Base value from existing passengers
-            value = route['DailyPassengers']
-            
-            # Add value from demand matrix
-            for i in range(len(stops)):
-                for j in range(i+1, len(stops)):
-                    value += self.demand_data.get((stops[i], stops[j]), 0) // 2
-            
-            # Add transfer point bonus
-            transfer_bonus = sum(10000 for stop in stops 
-                               if stop in self.transfer_points)
-            value += transfer_bonus
-            
-            bus_values.append((route['RouteID'], value))
-        
-        # Calculate metro values
-        metro_values = []
-        for _, line in self.metro_lines.iterrows():
-            stations = [s.strip() for s in line['Stations'].split(',')]
-            
-            # Base value from existing passengers
-            value = line['DailyPassengers']
-            
-            # Add value from demand matrix
-            for i in range(len(stations)):
-                for j in range(i+1, len(stations)):
-                    value += self.demand_data.get((stations[i], stations[j]), 0) // 2
-            
-            # Add transfer point bonus
-            transfer_bonus = sum(10000 for station in stations 
-                               if station in self.transfer_points)
-            value += transfer_bonus
-            
-            metro_values.append((line['LineID'], value))
+        bus_values = self._compute_route_values(self.bus_routes, 'RouteID', '_stops_list')
+        metro_values = self._compute_route_values(self.metro_lines, 'LineID', '_stations_list')
         
         # Optimize allocations
         bus_allocation = self._dp_allocate(
@@ -363,61 +559,39 @@ class PublicTransitOptimizer:
         metro_allocation: Dict[str, int]
     ) -> Tuple[List[Dict], List[Dict]]:
         """Generate optimized schedules with transfer information."""
-        bus_schedules = []
-        metro_schedules = []
-        
-        # Generate bus schedules
-        for _, route in self.bus_routes.iterrows():
-            route_id = route['RouteID']
-            assigned = bus_allocation.get(route_id, 5)
-            
-            # Skip routes with zero allocation
-            if assigned <= 0:
-                continue
-                
-            stops = [s.strip() for s in route['Stops'].split(',')]
-            
+        # Generate bus schedules (routes without an allocation default to 5 buses)
+        bus_ids = self.bus_routes['RouteID'].astype(object)
+        bus_assigned = bus_ids.map(bus_allocation).fillna(5).astype(int)
+        bus_frame = pd.DataFrame({
+            'Route': bus_ids,
+            'Stops': [list(stops) for stops in self.bus_routes['_stops_list']],
+            'Assigned Vehicles': bus_assigned,
+            # 18 operating hours; clip guards against dividing by zero
+            'Interval (min)': np.maximum(5, 1080 // bus_assigned.clip(lower=1)),
             # Find transfer points on this route
-            transfers = [stop for stop in stops if stop in self.transfer_points]
-            
-            # Calculate interval - ensure we don't divide by zero
-            interval = max(5, 1080 // max(1, assigned))  # 18 operating hours
-            
-            bus_schedules.append({
-                'Route': route_id,
-                'Stops': stops,
-                'Assigned Vehicles': assigned,
-                'Interval (min)': interval,
-                'Transfer Points': transfers,
-                'Daily Capacity': assigned * 50 * 20  # 50 passengers, 20 trips
-            })
-        
-        # Generate metro schedules
-        for _, line in self.metro_lines.iterrows():
-            line_id = line['LineID']
-            assigned = metro_allocation.get(line_id, 2)
-            
-            # Skip lines with zero allocation
-            if assigned <= 0:
-                continue
-                
-            stations = [s.strip() for s in line['Stations'].split(',')]
-            
+            'Transfer Points': [[stop for stop in stops if stop in self.transfer_points]
+                                for stops in self.bus_routes['_stops_list']],
+            'Daily Capacity': bus_assigned * 50 * 20  # 50 passengers, 20 trips
+        })
+        # Skip routes with zero allocation
+        bus_schedules = bus_frame[bus_assigned > 0].to_dict(orient='records')
+        
+        # Generate metro schedules (lines without an allocation default to 2 trains)
+        line_ids = self.metro_lines['LineID'].astype(object)
+        metro_assigned = line_ids.map(metro_allocation).fillna(2).astype(int)
+        metro_frame = pd.DataFrame({
+            'Line': line_ids,
+            'Stations': [list(stations) for stations in self.metro_lines['_stations_list']],
+            'Assigned Trains': metro_assigned,
+            # 18 operating hours; clip guards against dividing by zero
+            'Interval (min)': np.maximum(3, 1080 // metro_assigned.clip(lower=1)),
             # Find transfer points on this line
-            transfers = [station for station in stations 
-                        if station in self.transfer_points]
-            
-            # Calculate interval - ensure we don't divide by zero
-            interval = max(3, 1080 // max(1, assigned))  # 18 operating hours
-            
-            metro_schedules.append({
-                'Line': line_id,
-                'Stations': stations,
-                'Assigned Trains': assigned,
-                'Interval (min)': interval,
-                'Transfer Points': transfers,
-                'Daily Capacity': assigned * 500 * 20  # 500 passengers, 20 trips
-            })
+            'Transfer Points': [[station for station in stations if station in self.transfer_points]
+                                for stations in self.metro_lines['_stations_list']],
+            'Daily Capacity': metro_assigned * 500 * 20  # 500 passengers, 20 trips
+        })
+        # Skip lines with zero allocation
+        metro_schedules = metro_frame[metro_assigned > 0].to_dict(orient='records')
         
         return bus_schedules, metro_schedules
     
@@ -429,43 +603,34 @@ class PublicTransitOptimizer:
             zoom_start=12
         )
         
-        # Add bus routes
-        for _, route in self.bus_routes.iterrows():
-            stops = [s.strip() for s in route['Stops'].split(',')]
-            for i in range(len(stops)-1):
-                if (stops[i] in self.node_positions and 
-                    stops[i+1] in self.node_positions):
-                    # Draw route line
-                    folium.PolyLine(
-                        locations=[
-                            self.node_positions[stops[i]],
-                            self.node_positions[stops[i+1]]
-                        ],
-                        color='blue',
-                        weight=2,
-                        opacity=0.7,
-                        popup=f"Bus Route {route['RouteID']}"
-                    ).add_to(m)
-        
-        # Add metro lines
-        for _, line in self.metro_lines.iterrows():
-            stations = [s.strip() for s in line['Stations'].split(',')]
-            for i in range(len(stations)-1):
-                if (stations[i] in self.node_positions and 
-                    stations[i+1] in self.node_positions):
-                    # Draw metro line
-                    folium.PolyLine(
-                        locations=[
-                            self.node_positions[stations[i]],
-                            self.node_positions[stations[i+1]]
-                        ],
-                        color='red',
-                        weight=4,
-                        opacity=0.9,
-                        popup=f"Metro Line {line['LineID']}"
-                    ).add_to(m)
-        
-        # Add transfer points
+        # Add bus routes (one polyline per route)
+        for route_id, stops in self.bus_routes[['RouteID', '_stops_list']].itertuples(index=False, name=None):
+            coords = [self.node_positions[stop] for stop in stops
+                      if stop in self.node_positions]
+            if len(coords) >= 2:
+                folium.PolyLine(
+                    locations=coords,
+                    color='blue',
+                    weight=2,
+                    opacity=0.7,
+                    popup=f"Bus Route {route_id}"
+                ).add_to(m)
+        
+        # Add metro lines (one polyline per line)
+        for line_id, stations in self.metro_lines[['LineID', '_stations_list']].itertuples(index=False, name=None):
+            coords = [self.node_positions[station] for station in stations
+                      if station in self.node_positions]
+            if len(coords) >= 2:
+                folium.PolyLine(
+                    locations=coords,
+                    color='red',
+                    weight=4,
+                    opacity=0.9,
+                    popup=f"Metro Line {line_id}"
+                ).add_to(m)
+        
+        # Add transfer points as a single layer
+        transfer_layer = folium.FeatureGroup(name="Transfer Points")
         for point in self.transfer_points:
             if point in self.node_positions:
                 folium.CircleMarker(
@@ -475,6 +640,7 @@ class PublicTransitOptimizer:
                     fill=True,
                     fill_color='green',
                     popup=f"Transfer Point: {point}"
-                ).add_to(m)
+                ).add_to(transfer_layer)
+        transfer_layer.add_to(m)
         
         return m._repr_html_()
\ No newline at end of file
@@ -2,11 +2,15 @@ import streamlit as st
 import pandas as pd
 import folium
 import networkx as nx
+import numpy as np
 from utils.helpers import load_data, build_map
 
 def prim_mst(graph, start):
     """
     Compute the Minimum Spanning Tree (MST) of a graph using Prim's algorithm.
+    
+    Heap entries are packed (weight, u, v) tuples; the edge data dict is only
+    looked up once an edge joins the tree.
     Args:
         graph: A NetworkX-like graph object with .nodes() and .edges(data=True)
         start: The starting node ID
@@ -15,30 +19,86 @@ def prim_mst(graph, start):
     """
     import heapq
 
+    num_nodes = len(graph)
     visited = set([start])
     edges = []
     mst_edges = []
 
     # Add all edges from the start node to the heap
-    for neighbor in graph.neighbors(start):
-        data = graph[start][neighbor]
-        heapq.heappush(edges, (data['weight'], start, neighbor, data))
+    for neighbor, data in graph[start].items():
+        heapq.heappush(edges, (data['weight'], start, neighbor))
 
-    while edges and len(visited) < len(graph.nodes()):
-        weight, u, v, data = heapq.heappop(edges)
+    while edges and len(visited) < num_nodes:
+        weight, u, v = heapq.heappop(edges)
         if v in visited:
             continue
         # Add edge to MST
-        mst_edges.append((u, v, data))
+        mst_edges.append((u, v, graph[u][v]))
         visited.add(v)
         # Add new edges from the newly visited node
-        for neighbor in graph.neighbors(v):
+        for neighbor, ndata in graph[v].items():
             if neighbor not in visited:
-                ndata = graph[v][neighbor]
-                heapq.heappush(edges, (ndata['weight'], v, neighbor, ndata))
+                heapq.heappush(edges, (ndata['weight'], v, neighbor))
 
     return mst_edges
 
+# Graphs with at least this many edges use the array-sorted Kruskal variant
+LARGE_GRAPH_EDGES = 5000
+
+def kruskal_mst(graph, start):
+    """
+    Compute the MST of the component containing start using Kruskal's algorithm.
+    
+    Edges are mapped to integer node indices and sorted once with NumPy, then
+    merged with a list-based union-find (path halving plus union by rank),
+    which avoids Prim's per-edge heap pushes of (weight, u, v, data) tuples
+    on large road networks.
+    Args:
+        graph: A NetworkX-like graph object with .nodes() and .edges(data=True)
+        start: The starting node ID (selects the connected component)
+    Returns:
+        mst_edges: List of (u, v, data) tuples representing the MST edges
+    """
+    index = {node: i for i, node in enumerate(graph.nodes())}
+    edges = list(graph.edges(data=True))
+    num_edges = len(edges)
+    weights = np.fromiter((data['weight'] for _, _, data in edges), dtype=np.float64, count=num_edges)
+    src = np.fromiter((index[u] for u, _, _ in edges), dtype=np.intp, count=num_edges)
+    dst = np.fromiter((index[v] for _, v, _ in edges), dtype=np.intp, count=num_edges)
+    order = np.argsort(weights, kind='stable')
+
+    num_nodes = len(index)
+    parent = list(range(num_nodes))
+    rank = [0] * num_nodes
+
+    def find(node):
+        # Union-find root lookup with path halving
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    # Merge components along edges in increasing weight order
+    tree_edges = []
+    for k, u, v in zip(order.tolist(), src[order].tolist(), dst[order].tolist()):
+        root_u, root_v = find(u), find(v)
+        if root_u == root_v:
+            continue
+        # Union by rank keeps the trees shallow
+        if rank[root_u] < rank[root_v]:
+            root_u, root_v = root_v, root_u
+        parent[root_v] = root_u
+        if rank[root_u] == rank[root_v]:
+            rank[root_u] += 1
+        tree_edges.append(k)
+        # A spanning forest never has more than V - 1 edges
+        if len(tree_edges) == num_nodes - 1:
+            break
+
+    # Keep only the tree spanning the start node's component
+    start_root = find(index[start])
+    return [edges[k] for k in tree_edges if find(int(src[k])) == start_root]
+
 def run_mst(source, dest, time_of_day, scenario):
     """
     Run Minimum Spanning Tree algorithm on the transportation network.
@@ -63,35 +123,37 @@ def run_mst(source, dest, time_of_day, scenario):
 
     mst_results = {}
     if len(base_graph.edges()) > 0:
-        # Run the MST algorithm "prim"
-        mst_edges = prim_mst(base_graph, source)
-        
-        # Convert the list of edges to a NetworkX graph
-        mst = nx.Graph()
-        for u, v, data in mst_edges:
-            mst.add_edge(u, v, **data)
+        # Run the MST algorithm ("prim", or "kruskal" for large networks)
+        if len(base_graph.edges()) >= LARGE_GRAPH_EDGES:
+            mst_edges = kruskal_mst(base_graph, source)
+        else:
+            mst_edges = prim_mst(base_graph, source)
 
-        # Add MST edges to the map
+        # Collect the distance total, line segments and road names in one pass
+        total_dist = 0
+        segments = []
+        road_names = []
         for u, v, data in mst_edges:
-            # Create detailed popup text
-            popup_text = f"""
-            <b>{data['name']}</b><br>
-            Distance: {data['weight']:.1f} km<br>
-            Capacity: {data['capacity']} vehicles/hour<br>
-            Condition: {data['condition']}/10
-            """
-            
-            folium.PolyLine(
-                [node_positions[u], node_positions[v]],
-                color="green", weight=3,
-                popup=popup_text
-            ).add_to(m)
-
-        total_dist = sum(data['weight'] for _, _, data in mst_edges)
+            total_dist += data['weight']
+            segments.append([node_positions[u], node_positions[v]])
+            road_names.append(data['name'])
+
+        # Add all MST edges to the map as a single multi-segment line
+        popup_text = f"""
+        <b>Minimum Spanning Tree</b><br>
+        Roads: {len(mst_edges)}<br>
+        Total Distance: {total_dist:.1f} km
+        """
+        
+        folium.PolyLine(
+            segments,
+            color="green", weight=3,
+            popup=popup_text
+        ).add_to(m)
 
         mst_results["total_distance"] = total_dist
         mst_results["num_edges"] = len(mst_edges)
-        mst_results["roads"] = [data['name'] for _, _, data in mst_edges]
+        mst_results["roads"] = road_names
     else:
         mst_results["warning"] = "No valid roads between neighborhoods!"
 
@@ -4,10 +4,11 @@ import folium
 import pandas as pd
 import numpy as np
 import time
+import json
 from algorithms.mst import run_mst
 from algorithms.a_star import find_nearest_hospital, run_emergency_routing
 from utils.helpers import load_data, build_map, load_transit_data
-from utils.traffic_lights import load_traffic_lights_data, calculate_traffic_light_delay, add_traffic_lights_to_map
+from utils.traffic_lights import load_traffic_lights_data, calculate_traffic_light_delay, add_traffic_lights_to_map, light_delay
 from collections import defaultdict
 from algorithms.dp_schedule import PublicTransitOptimizer
 import networkx as nx
@@ -15,6 +16,76 @@ from algorithms.dijkstra import run_dijkstra
 import os
 from pathlib import Path
 
+# Share of the condition-adjusted speed reached in each time period
+SPEED_FACTORS = {
+    "Morning Rush": 0.6,  # 60% of max speed
+    "Midday": 0.9,        # 90% of max speed
+    "Evening Rush": 0.5,  # 50% of max speed 
+    "Night": 1.0          # 100% of max speed
+}
+
+# Fixed fields of the sample network status rows (everything but the name)
+METRO_STATUS = {
+    "Status": "Operating Normally",
+    "Next Train": "2 minutes",
+    "Crowding": "Moderate",
+    "Delays": "None"
+}
+BUS_STATUS = {
+    "Status": "Operating Normally",
+    "Next Bus": "5 minutes",
+    "Crowding": "Light",
+    "Delays": "None"
+}
+TRANSFER_POINT_STATUS = {
+    "Status": "Open",
+    "Crowding": "Moderate",
+    "Facilities": "All Operating",
+    "Next Connections": "< 5 minutes"
+}
+
+# Placeholder rows shown when a part of the network has no data
+NO_METRO_STATUS = {
+    "Line": "No metro lines available",
+    **dict.fromkeys(METRO_STATUS, "N/A")
+}
+NO_BUS_STATUS = {
+    "Route": "No bus routes available",
+    **dict.fromkeys(BUS_STATUS, "N/A")
+}
+NO_TRANSFER_POINT_STATUS = {
+    "Location": "No transfer points available",
+    **dict.fromkeys(TRANSFER_POINT_STATUS, "N/A")
+}
+
+# Seconds a computed network status is reused before being rebuilt
+NETWORK_STATUS_TTL = 5.0
+
+# Rows reported when the network status cannot be built; "Delays" carries the error
+ERROR_METRO_STATUS = {
+    "Line": "Error loading metro lines",
+    "Status": "Error",
+    "Next Train": "Unknown",
+    "Crowding": "Unknown"
+}
+ERROR_BUS_STATUS = {
+    "Route": "Error loading bus routes",
+    "Status": "Error",
+    "Next Bus": "Unknown",
+    "Crowding": "Unknown"
+}
+ERROR_TRANSFER_POINT_STATUS = {
+    "Location": "Error loading transfer points",
+    "Status": "Error",
+    **dict.fromkeys(("Crowding", "Facilities", "Next Connections"), "Unknown")
+}
+
+def get_speed_by_condition(condition):
+    """Calculate speed (km/h) based on road condition."""
+    base_speed = 60  # Base speed in km/h
+    # Adjust for road condition (1-10)
+    return base_speed * (0.5 + condition / 20.0)
+
 class TransportationController:
     """
     Main controller class for the Smart City Transportation System.
@@ -29,22 +100,47 @@ class TransportationController:
         )
         
         # Create lookup dictionaries for efficient name resolution
-        self.neighborhood_names = {
-            str(row["ID"]): row["Name"]
-            for _, row in self.neighborhoods.iterrows()
-        }
-        self.facility_names = {
-            str(row["ID"]): row["Name"]
-            for _, row in self.facilities.iterrows()
-        }
-        self.road_names = {
-            (str(row["FromID"]), str(row["ToID"])): row["Name"]
-            for _, row in self.roads.iterrows()
-        }
+        neighborhood_ids = self.neighborhoods["ID"].astype(str)
+        facility_ids = self.facilities["ID"].astype(str)
+        self.neighborhood_names = dict(zip(neighborhood_ids, self.neighborhoods["Name"]))
+        self.facility_names = dict(zip(facility_ids, self.facilities["Name"]))
+        # Single lookup table for locations; neighborhood names win on ID clashes
+        self.location_names = {**self.facility_names, **self.neighborhood_names}
+        
+        # Roads are undirected, so store both directions; the listed
+        # direction wins when a road appears both ways
+        from_ids = self.roads["FromID"].astype(str)
+        to_ids = self.roads["ToID"].astype(str)
+        self.road_names = dict(zip(zip(to_ids, from_ids), self.roads["Name"]))
+        self.road_names.update(zip(zip(from_ids, to_ids), self.roads["Name"]))
+
+        # Index traffic lights by directed road: (FromID, ToID) -> (row position, record)
+        # of the first matching row, so path analysis avoids DataFrame scans
+        self.traffic_light_index = {}
+        if not self.traffic_lights.empty:
+            for position, light in enumerate(self.traffic_lights.to_dict('records')):
+                self.traffic_light_index.setdefault((light['FromID'], light['ToID']), (position, light))
+
+        # Stop-to-stop distances shared by transit network builds and route details
+        self.segment_distances = {}
+
+        # Transit network graphs keyed by (schedule content, show_traffic_lights)
+        self.transit_networks = {}
+
+        # Per-period travel times of road segments, keyed by (from_id, to_id)
+        self.segment_times = {}
+
+        # analyze_path results keyed by (path, time_of_day)
+        self.path_analyses = {}
+
+        # Last network status, reused for NETWORK_STATUS_TTL seconds
+        self._status_cache = None
+        self._status_cache_key = None
+        self._status_cache_time = 0.0
 
         # Create set of valid nodes for validation
-        self.valid_nodes = set(str(row["ID"]) for _, row in self.neighborhoods.iterrows())
-        self.valid_nodes.update(str(row["ID"]) for _, row in self.facilities.iterrows())
+        self.valid_nodes = set(neighborhood_ids)
+        self.valid_nodes.update(facility_ids)
 
         # Load public transit data
         try:
@@ -57,29 +153,60 @@ class TransportationController:
         
     def get_location_name(self, location_id: str) -> str:
         """Get the name of a location (neighborhood or facility) from its ID."""
-        if location_id in self.neighborhood_names:
-            return self.neighborhood_names[location_id]
-        elif location_id in self.facility_names:
-            return self.facility_names[location_id]
-        return location_id
+        return self.location_names.get(location_id, location_id)
     
     def get_road_name(self, from_id: str, to_id: str) -> str:
         """Get the name of a road from its endpoint IDs."""
-        # Try both directions as roads are undirected
-        if (from_id, to_id) in self.road_names:
-            return self.road_names[(from_id, to_id)]
-        elif (to_id, from_id) in self.road_names:
-            return self.road_names[(to_id, from_id)]
-        return f"{from_id} → {to_id}"
+        # road_names holds both directions as roads are undirected
+        road_name = self.road_names.get((from_id, to_id))
+        if road_name is None:
+            return f"{from_id} → {to_id}"
+        return road_name
+
+    def get_segment_distance(self, from_id: str, to_id: str) -> float:
+        """Get the scaled straight-line distance between two stops, computed once per pair."""
+        key = (from_id, to_id) if from_id <= to_id else (to_id, from_id)
+        distance = self.segment_distances.get(key)
+        if distance is None:
+            start_pos = self.node_positions[from_id]
+            end_pos = self.node_positions[to_id]
+            distance = ((start_pos[0] - end_pos[0])**2 + 
+                        (start_pos[1] - end_pos[1])**2)**0.5 * 100
+            self.segment_distances[key] = distance
+        return distance
 
     def analyze_path(self, path: list, time_of_day: str) -> Dict[str, Any]:
-        """Analyze a path and return detailed metrics."""
+        """
+        Analyze a path and return detailed metrics.
+        
+        Results are memoized per (path, time_of_day). Paths without traffic
+        lights are reused as is; paths with lights are reused only within the
+        same second, since the light delays and states follow the clock.
+        """
         if not path or len(path) < 2:
             return {}
 
         # Get current time for traffic light calculations
         current_time = int(time.time())
 
+        key = (tuple(path), time_of_day)
+        cached = self.path_analyses.get(key)
+        if cached is not None and cached[0] in (None, current_time):
+            return cached[1]
+
+        analysis = self._analyze_path(path, time_of_day, current_time)
+
+        # Keep the cache bounded
+        if len(self.path_analyses) >= 512:
+            self.path_analyses.clear()
+        self.path_analyses[key] = (
+            current_time if analysis["traffic_lights_count"] else None,
+            analysis
+        )
+        return analysis
+
+    def _analyze_path(self, path: list, time_of_day: str, current_time: int) -> Dict[str, Any]:
+        """Compute the path metrics for analyze_path at the given time."""
         analysis = {
             "total_distance": 0,
             "total_time": 0,
@@ -91,23 +218,9 @@ class TransportationController:
             "bottlenecks": []
         }
         
-        # Define speed factors for different times of day
-        speed_factors = {
-            "Morning Rush": 0.6,  # 60% of max speed
-            "Midday": 0.9,        # 90% of max speed
-            "Evening Rush": 0.5,  # 50% of max speed 
-            "Night": 1.0          # 100% of max speed
-        }
-        
-        # Define base speeds by road condition
-        def get_speed_by_condition(condition):
-            """Calculate speed (km/h) based on road condition."""
-            base_speed = 60  # Base speed in km/h
-            # Adjust for road condition (1-10)
-            return base_speed * (0.5 + condition / 20.0)
-
-        # Analyze each segment
+        # Analyze each segment, accumulating the per-period totals as we go
         conditions = []
+        total_times = dict.fromkeys(SPEED_FACTORS, 0)
         for i in range(len(path) - 1):
             from_id = path[i]
             to_id = path[i + 1]
@@ -119,18 +232,17 @@ class TransportationController:
             condition = edge_data["condition"]
             capacity = edge_data["capacity"]
             
-            # Calculate times for different periods
-            times = {}
-            for period in ["Morning Rush", "Midday", "Evening Rush", "Night"]:
-                # Get the speed factor for this time period
-                speed_factor = speed_factors[period]
-                
-                # Calculate the actual speed based on road condition and time of day
+            # Calculate times for different periods once per road; the condition
+            # speed is shared by all periods, only the time-of-day factor changes
+            period_times = self.segment_times.get((from_id, to_id))
+            if period_times is None:
                 base_speed = get_speed_by_condition(condition)
-                actual_speed = base_speed * speed_factor
-                
-                # Convert distance to time (hours), then to minutes
-                times[period] = (distance / actual_speed) * 60
+                period_times = {
+                    period: (distance / (base_speed * speed_factor)) * 60
+                    for period, speed_factor in SPEED_FACTORS.items()
+                }
+                self.segment_times[(from_id, to_id)] = period_times
+            times = dict(period_times)
             
             current_time_weight = times[time_of_day]
             
@@ -140,21 +252,22 @@ class TransportationController:
             traffic_light_status = None
             
             if has_traffic_light and not self.traffic_lights.empty:
-                # Calculate traffic light delay
-                traffic_light_delay = calculate_traffic_light_delay(
-                    from_id, to_id, self.traffic_lights, current_time
-                )
+                forward = self.traffic_light_index.get((from_id, to_id))
+                backward = self.traffic_light_index.get((to_id, from_id))
+                
+                # Calculate traffic light delay (same-direction light first)
+                delay_light = forward or backward
+                if delay_light:
+                    traffic_light_delay = light_delay(delay_light[1], current_time)
+                else:
+                    traffic_light_delay = 0.0
                 analysis["total_traffic_light_delay"] += traffic_light_delay
                 analysis["traffic_lights_count"] += 1
                 
-                # Get traffic light status for display
-                light = self.traffic_lights[
-                    ((self.traffic_lights["FromID"] == from_id) & (self.traffic_lights["ToID"] == to_id)) |
-                    ((self.traffic_lights["FromID"] == to_id) & (self.traffic_lights["ToID"] == from_id))
-                ]
-                
-                if not light.empty:
-                    light_data = light.iloc[0]
+                # Get traffic light status for display from the first light in either direction
+                candidates = [light for light in (forward, backward) if light]
+                if candidates:
+                    light_data = min(candidates, key=lambda light: light[0])[1]
                     cycle_time = int(light_data['CycleTime'])
                     green_time = int(light_data['GreenTime'])
                     yellow_time = int(light_data['YellowTime'])
@@ -187,6 +300,8 @@ class TransportationController:
             analysis["total_distance"] += distance
             analysis["total_time"] += current_time_weight + traffic_light_delay
             conditions.append(condition)
+            for period, period_time in times.items():
+                total_times[period] += period_time + traffic_light_delay
             
             # Check for bottlenecks (high time difference, poor condition, or traffic light)
             is_bottleneck = False
@@ -219,11 +334,6 @@ class TransportationController:
         analysis["avg_condition"] = sum(conditions) / len(conditions)
         
         # Calculate time comparisons
-        total_times = {
-            period: sum(seg["times"][period] + (seg["traffic_light_delay"] if seg["has_traffic_light"] else 0)
-                       for seg in analysis["road_segments"])
-            for period in ["Morning Rush", "Midday", "Evening Rush", "Night"]
-        }
         analysis["time_comparisons"] = total_times
         
         # Calculate best time to travel
@@ -244,13 +354,8 @@ class TransportationController:
             if self.bus_routes.empty or self.metro_lines.empty:
                 raise ValueError("Transit data not available")
             
-            # Create optimizer with valid nodes
-            optimizer = PublicTransitOptimizer()
-            optimizer.valid_nodes = self.valid_nodes
-            optimizer.bus_routes = optimizer._validate_routes(self.bus_routes, "bus")
-            optimizer.metro_lines = optimizer._validate_routes(self.metro_lines, "metro")
-            optimizer.demand_data = self.demand_data
-            optimizer._identify_transfer_points()
+            # Create optimizer from the transit data already loaded by the controller
+            optimizer = PublicTransitOptimizer(self.bus_routes, self.metro_lines, self.demand_data)
             
             # Build network and run optimization
             optimizer.build_integrated_network()
@@ -590,15 +695,12 @@ class TransportationController:
             if self.bus_routes.empty or self.metro_lines.empty:
                 raise ValueError("Transit data not available")
 
-            # Create specialized transit graph
-            transit_graph = nx.MultiGraph()
-            
             # Initialize schedules if not provided
             if schedules is None:
                 schedules = self._generate_default_schedules()
 
-            # Build transit network - make sure to pass show_traffic_lights parameter
-            all_stops = self._build_transit_network(transit_graph, schedules, show_traffic_lights)
+            # Get the transit network for these schedules (built once, then reused)
+            transit_graph = self._get_transit_network(schedules, show_traffic_lights)
             
             # Verify route exists
             if not nx.has_path(transit_graph, source, destination):
@@ -642,26 +744,26 @@ class TransportationController:
     def _generate_default_schedules(self) -> Dict:
         """Generate default schedules for bus routes and metro lines."""
         bus_schedules = []
-        for _, route in self.bus_routes.iterrows():
-            stops = [str(s).strip() for s in route["Stops"].split(",")]
+        for route_id, route_stops in zip(self.bus_routes["RouteID"], self.bus_routes["Stops"]):
+            stops = [str(s).strip() for s in route_stops.split(",")]
             valid_stops = [stop for stop in stops if stop in self.node_positions]
             
             if len(valid_stops) >= 2:
                 bus_schedules.append({
-                    "Route": route["RouteID"],
+                    "Route": route_id,
                     "Stops": valid_stops,
                     "Interval (min)": 15,
                     "Transfer Points": list(self.transfer_points)
                 })
 
         metro_schedules = []
-        for _, line in self.metro_lines.iterrows():
-            stations = [str(s).strip() for s in line["Stations"].split(",")]
+        for line_id, line_stations in zip(self.metro_lines["LineID"], self.metro_lines["Stations"]):
+            stations = [str(s).strip() for s in line_stations.split(",")]
             valid_stations = [station for station in stations if station in self.node_positions]
             
             if len(valid_stations) >= 2:
                 metro_schedules.append({
-                    "Line": line["LineID"],
+                    "Line": line_id,
                     "Stations": valid_stations,
                     "Interval (min)": 10,
                     "Transfer Points": list(self.transfer_points)
@@ -672,28 +774,89 @@ class TransportationController:
             "metro_schedules": metro_schedules
         }
 
+    def _get_transit_network(self, schedules: Dict, show_traffic_lights: bool = True) -> nx.MultiGraph:
+        """
+        Get the transit network graph for a set of schedules.
+        
+        Graphs are cached by schedule content, so repeated route requests skip
+        the rebuild; only the time-dependent traffic light fields are refreshed.
+        """
+        key = (
+            json.dumps(
+                [schedules["bus_schedules"], schedules["metro_schedules"]],
+                sort_keys=True, default=str
+            ),
+            show_traffic_lights
+        )
+        transit_graph = self.transit_networks.get(key)
+        if transit_graph is not None:
+            self._refresh_traffic_lights(transit_graph)
+            return transit_graph
+
+        transit_graph = nx.MultiGraph()
+        self._build_transit_network(transit_graph, schedules, show_traffic_lights)
+
+        # Keep only a few schedule variants alive
+        if len(self.transit_networks) >= 8:
+            self.transit_networks.clear()
+        self.transit_networks[key] = transit_graph
+        return transit_graph
+
+    def _traffic_light_state(self, from_id: str, to_id: str, traffic_light_data: Dict, current_time: int):
+        """Get the (delay, signal status) of the traffic light on a transit segment."""
+        # Same-direction light first, as in calculate_traffic_light_delay
+        light = self.traffic_light_index.get((from_id, to_id)) or self.traffic_light_index.get((to_id, from_id))
+        traffic_light_delay = light_delay(light[1], current_time) if light else 0.0
+        
+        # Determine traffic light status
+        cycle_time = int(traffic_light_data.get('CycleTime', 60))
+        green_time = int(traffic_light_data.get('GreenTime', 30))
+        yellow_time = int(traffic_light_data.get('YellowTime', 5))
+        
+        # Calculate current position in cycle
+        cycle_position = current_time % cycle_time
+        
+        # Determine light state
+        if cycle_position < green_time:
+            traffic_light_status = "GREEN"
+        elif cycle_position < (green_time + yellow_time):
+            traffic_light_status = "YELLOW"
+        else:
+            traffic_light_status = "RED"
+        
+        return traffic_light_delay, traffic_light_status
+
+    def _refresh_traffic_lights(self, transit_graph: nx.MultiGraph):
+        """Recompute traffic light delay and status on a cached transit network."""
+        current_time = int(time.time())
+        for u, v, key, from_id, to_id in transit_graph.graph.get("traffic_light_edges", []):
+            edge_data = transit_graph[u][v][key]
+            edge_data["traffic_light_delay"], edge_data["traffic_light_status"] = self._traffic_light_state(
+                from_id, to_id, edge_data["traffic_light_data"], current_time
+            )
+
     def _build_transit_network(self, transit_graph: nx.MultiGraph, schedules: Dict, show_traffic_lights: bool = True) -> set:
         """Build the transit network graph with bus routes and metro lines."""
         # Collect all stops and stations
         all_stops = set()
+        light_edges = transit_graph.graph.setdefault("traffic_light_edges", [])
         
-        # Load traffic lights if enabled
-        traffic_lights = None
-        if show_traffic_lights:
-            traffic_lights = self.traffic_lights
-            
         # Get current time for traffic light state calculations
         current_time = int(time.time())
         
         # Pre-process traffic lights for faster lookup
         traffic_light_lookup = {}
         if show_traffic_lights and not self.traffic_lights.empty:
-            for _, light in self.traffic_lights.iterrows():
+            for light in self.traffic_lights.to_dict('records'):
                 from_id = str(light['FromID'])
                 to_id = str(light['ToID'])
                 # Store in both directions since the graph is undirected
-                traffic_light_lookup[(from_id, to_id)] = light.to_dict()
-                traffic_light_lookup[(to_id, from_id)] = light.to_dict()
+                traffic_light_lookup[(from_id, to_id)] = light
+                traffic_light_lookup[(to_id, from_id)] = light
+        
+        # Route edges are collected and added to the graph in one batch
+        route_edges = []
+        lit_segments = []
         
         # Add bus routes
         for route in schedules["bus_schedules"]:
@@ -702,10 +865,7 @@ class TransportationController:
             
             # Add edges between consecutive stops
             for i in range(len(stops) - 1):
-                start_pos = self.node_positions[stops[i]]
-                end_pos = self.node_positions[stops[i + 1]]
-                distance = ((start_pos[0] - end_pos[0])**2 + 
-                          (start_pos[1] - end_pos[1])**2)**0.5 * 100
+                distance = self.get_segment_distance(stops[i], stops[i + 1])
                 travel_time = max(5, (distance / 30) * 60)
                 
                 # Check for traffic light at this segment using the lookup
@@ -721,27 +881,10 @@ class TransportationController:
                         has_traffic_light = True
                         traffic_light_data = traffic_light_lookup[light_key]
                         
-                        # Calculate traffic light delay
-                        from utils.traffic_lights import calculate_traffic_light_delay
-                        traffic_light_delay = calculate_traffic_light_delay(
-                            stops[i], stops[i+1], traffic_lights, current_time
+                        # Calculate traffic light delay and status
+                        traffic_light_delay, traffic_light_status = self._traffic_light_state(
+                            stops[i], stops[i+1], traffic_light_data, current_time
                         )
-                        
-                        # Determine traffic light status
-                        cycle_time = int(traffic_light_data.get('CycleTime', 60))
-                        green_time = int(traffic_light_data.get('GreenTime', 30))
-                        yellow_time = int(traffic_light_data.get('YellowTime', 5))
-                        
-                        # Calculate current position in cycle
-                        cycle_position = current_time % cycle_time
-                        
-                        # Determine light state
-                        if cycle_position < green_time:
-                            traffic_light_status = "GREEN"
-                        elif cycle_position < (green_time + yellow_time):
-                            traffic_light_status = "YELLOW"
-                        else:
-                            traffic_light_status = "RED"
 
                 edge_data = {
                     "type": "bus",
@@ -755,9 +898,13 @@ class TransportationController:
                     "traffic_light_status": traffic_light_status
                 }
                 
+                # Remember lit segments so cached networks can refresh their lights
+                if has_traffic_light:
+                    lit_segments.append((len(route_edges), stops[i], stops[i + 1]))
+                
                 # Add edge in both directions since it's an undirected graph
-                transit_graph.add_edge(stops[i], stops[i + 1], **edge_data)
-                transit_graph.add_edge(stops[i + 1], stops[i], **edge_data)
+                route_edges.append((stops[i], stops[i + 1], edge_data))
+                route_edges.append((stops[i + 1], stops[i], edge_data))
         
         # Add metro lines
         for line in schedules["metro_schedules"]:
@@ -766,10 +913,7 @@ class TransportationController:
             
             # Add edges between consecutive stations
             for i in range(len(stations) - 1):
-                start_pos = self.node_positions[stations[i]]
-                end_pos = self.node_positions[stations[i + 1]]
-                distance = ((start_pos[0] - end_pos[0])**2 + 
-                          (start_pos[1] - end_pos[1])**2)**0.5 * 100
+                distance = self.get_segment_distance(stations[i], stations[i + 1])
                 travel_time = max(3, (distance / 60) * 60)
                 
                 # Check for traffic light at this segment using the lookup
@@ -785,27 +929,10 @@ class TransportationController:
                         has_traffic_light = True
                         traffic_light_data = traffic_light_lookup[light_key]
                         
-                        # Calculate traffic light delay
-                        from utils.traffic_lights import calculate_traffic_light_delay
-                        traffic_light_delay = calculate_traffic_light_delay(
-                            stations[i], stations[i+1], traffic_lights, current_time
+                        # Calculate traffic light delay and status
+                        traffic_light_delay, traffic_light_status = self._traffic_light_state(
+                            stations[i], stations[i+1], traffic_light_data, current_time
                         )
-                        
-                        # Determine traffic light status
-                        cycle_time = int(traffic_light_data.get('CycleTime', 60))
-                        green_time = int(traffic_light_data.get('GreenTime', 30))
-                        yellow_time = int(traffic_light_data.get('YellowTime', 5))
-                        
-                        # Calculate current position in cycle
-                        cycle_position = current_time % cycle_time
-                        
-                        # Determine light state
-                        if cycle_position < green_time:
-                            traffic_light_status = "GREEN"
-                        elif cycle_position < (green_time + yellow_time):
-                            traffic_light_status = "YELLOW"
-                        else:
-                            traffic_light_status = "RED"
                 
                 edge_data = {
                     "type": "metro",
@@ -819,9 +946,18 @@ class TransportationController:
                     "traffic_light_status": traffic_light_status
                 }
                 
+                # Remember lit segments so cached networks can refresh their lights
+                if has_traffic_light:
+                    lit_segments.append((len(route_edges), stations[i], stations[i + 1]))
+                
                 # Add edge in both directions since it's an undirected graph
-                transit_graph.add_edge(stations[i], stations[i + 1], **edge_data)
-                transit_graph.add_edge(stations[i + 1], stations[i], **edge_data)
+                route_edges.append((stations[i], stations[i + 1], edge_data))
+                route_edges.append((stations[i + 1], stations[i], edge_data))
+        
+        edge_keys = transit_graph.add_edges_from(route_edges)
+        for index, from_id, to_id in lit_segments:
+            light_edges.append((from_id, to_id, edge_keys[index], from_id, to_id))
+            light_edges.append((to_id, from_id, edge_keys[index + 1], from_id, to_id))
         
         # Add transfer edges
         for stop in all_stops:
@@ -1196,10 +1332,7 @@ class TransportationController:
             current_mode = transport_mode
             
             # Calculate distance
-            start_pos = self.node_positions[path[i]]
-            end_pos = self.node_positions[path[i + 1]]
-            distance = ((start_pos[0] - end_pos[0])**2 + 
-                      (start_pos[1] - end_pos[1])**2)**0.5 * 100
+            distance = self.get_segment_distance(path[i], path[i + 1])
             total_distance += distance
             
             # Create step details
@@ -1232,102 +1365,64 @@ class TransportationController:
 
     def get_network_status(self) -> Dict[str, Any]:
         """Get current status of the public transit network."""
+        # Reuse the last status while the transit data is unchanged
+        key = (
+            id(self.metro_lines), len(self.metro_lines),
+            id(self.bus_routes), len(self.bus_routes),
+            id(self.transfer_points), len(self.transfer_points)
+        )
+        now = time.monotonic()
+        if key == self._status_cache_key and now - self._status_cache_time < NETWORK_STATUS_TTL:
+            return self._status_cache
+
         try:
             # In a real system, this would fetch live data
             # Here we'll generate sample status data
             
             # Metro lines status
-            metro_lines = []
             if not self.metro_lines.empty:
-                for _, line in self.metro_lines.iterrows():
-                    metro_lines.append({
-                        "Line": f"Metro {line['LineID']}",
-                        "Status": "Operating Normally",
-                        "Next Train": "2 minutes",
-                        "Crowding": "Moderate",
-                        "Delays": "None"
-                    })
+                labels = ("Metro " + self.metro_lines['LineID'].astype(str)).tolist()
+                metro_lines = [{"Line": label, **METRO_STATUS} for label in labels]
             else:
-                metro_lines.append({
-                    "Line": "No metro lines available",
-                    "Status": "N/A",
-                    "Next Train": "N/A",
-                    "Crowding": "N/A",
-                    "Delays": "N/A"
-                })
+                metro_lines = [dict(NO_METRO_STATUS)]
             
             # Bus routes status
-            bus_routes = []
             if not self.bus_routes.empty:
-                for _, route in self.bus_routes.iterrows():
-                    bus_routes.append({
-                        "Route": f"Bus {route['RouteID']}",
-                        "Status": "Operating Normally",
-                        "Next Bus": "5 minutes",
-                        "Crowding": "Light",
-                        "Delays": "None"
-                    })
+                labels = ("Bus " + self.bus_routes['RouteID'].astype(str)).tolist()
+                bus_routes = [{"Route": label, **BUS_STATUS} for label in labels]
             else:
-                bus_routes.append({
-                    "Route": "No bus routes available",
-                    "Status": "N/A",
-                    "Next Bus": "N/A",
-                    "Crowding": "N/A",
-                    "Delays": "N/A"
-                })
+                bus_routes = [dict(NO_BUS_STATUS)]
             
             # Transfer points status
-            transfer_points = []
             if self.transfer_points:
-                for point in self.transfer_points:
-                    point_name = self.get_location_name(point)
-                    transfer_points.append({
-                        "Location": point_name if point_name else point,
-                        "Status": "Open",
-                        "Crowding": "Moderate",
-                        "Facilities": "All Operating",
-                        "Next Connections": "< 5 minutes"
-                    })
+                # Resolve all names against the merged lookup table in one pass
+                names = self.location_names
+                transfer_points = [
+                    {"Location": names.get(point) or point, **TRANSFER_POINT_STATUS}
+                    for point in self.transfer_points
+                ]
             else:
-                transfer_points.append({
-                    "Location": "No transfer points available",
-                    "Status": "N/A",
-                    "Crowding": "N/A",
-                    "Facilities": "N/A",
-                    "Next Connections": "N/A"
-                })
-            
-            return {
-                "metro_lines": metro_lines,
-                "bus_routes": bus_routes,
-                "transfer_points": transfer_points,
-                "last_updated": "Just now"
-            }
-            
+                transfer_points = [dict(NO_TRANSFER_POINT_STATUS)]
+
         except Exception as e:
             print(f"Error getting network status: {str(e)}")
             # Return a default error status
+            error = str(e)
             return {
-                "metro_lines": [{
-                    "Line": "Error loading metro lines",
-                    "Status": "Error",
-                    "Next Train": "Unknown",
-                    "Crowding": "Unknown",
-                    "Delays": str(e)
-                }],
-                "bus_routes": [{
-                    "Route": "Error loading bus routes",
-                    "Status": "Error",
-                    "Next Bus": "Unknown",
-                    "Crowding": "Unknown",
-                    "Delays": str(e)
-                }],
-                "transfer_points": [{
-                    "Location": "Error loading transfer points",
-                    "Status": "Error",
-                    "Crowding": "Unknown",
-                    "Facilities": "Unknown",
-                    "Next Connections": "Unknown"
-                }],
+                "metro_lines": [{**ERROR_METRO_STATUS, "Delays": error}],
+                "bus_routes": [{**ERROR_BUS_STATUS, "Delays": error}],
+                "transfer_points": [dict(ERROR_TRANSFER_POINT_STATUS)],
                 "last_updated": "Error"
             }
+
+        # Assemble and remember the status outside the guarded data access
+        status = {
+            "metro_lines": metro_lines,
+            "bus_routes": bus_routes,
+            "transfer_points": transfer_points,
+            "last_updated": "Just now"
+        }
+        self._status_cache = status
+        self._status_cache_key = key
+        self._status_cache_time = now
+        return status
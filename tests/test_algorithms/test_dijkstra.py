@@ -2,7 +2,10 @@ import unittest
 import pandas as pd
 import networkx as nx
 from unittest.mock import patch, MagicMock
-from algorithms.dijkstra import dijkstra_shortest_path, run_dijkstra
+from algorithms.dijkstra import (
+    dijkstra_shortest_path, run_dijkstra, run_dijkstra_batch,
+    build_graph_index, contract_chains
+)
 from tests import SAMPLE_NEIGHBORHOODS, SAMPLE_ROADS, SAMPLE_FACILITIES
 
 class TestDijkstraAlgorithm(unittest.TestCase):
@@ -133,5 +136,43 @@ class TestDijkstraAlgorithm(unittest.TestCase):
         self.assertIsNotNone(results["path"])
         self.assertNotIn("2", results["path"])
 
+    @patch('algorithms.dijkstra.build_map')
+    @patch('algorithms.dijkstra.load_data')
+    def test_run_dijkstra_batch(self, mock_load_data, mock_build_map):
+        """Test answering several queries on one graph build."""
+        mock_load_data.return_value = (self.neighborhoods, self.roads, self.facilities, None)
+        mock_build_map.return_value = (MagicMock(), self.node_positions, None, self.graph)
+        
+        queries = [("1", "3"), ("1", "2"), ("2", "3"), ("1", "missing")]
+        results = run_dijkstra_batch(queries)
+        
+        # Each answer should match a single-query search
+        for source, dest in queries[:3]:
+            _, expected = dijkstra_shortest_path(self.graph, source, dest)
+            path, distance = results[(source, dest)]
+            self.assertAlmostEqual(distance, expected)
+            self.assertEqual(path[0], source)
+            self.assertEqual(path[-1], dest)
+        
+        # Unknown destinations have no path
+        self.assertEqual(results[("1", "missing")], ([], float('inf')))
+        mock_build_map.assert_called_once()
+
+    def test_contract_chains(self):
+        """Test collapsing degree-2 chains into single edges."""
+        chain = nx.Graph()
+        chain.add_edge("A", "x", weight=1.0)
+        chain.add_edge("x", "y", weight=2.0)
+        chain.add_edge("y", "B", weight=3.0)
+        chain.add_edge("A", "B", weight=10.0)
+        
+        (nodes, index, adjacency), chains = contract_chains(build_graph_index(chain), ["A", "B"])
+        
+        # Only A and B remain, joined by the lighter 6 km chain through x and y
+        self.assertEqual(sorted(nodes), ["A", "B"])
+        self.assertEqual(adjacency[index["A"]], [(index["B"], 6.0)])
+        self.assertEqual(chains[(index["A"], index["B"])], ["x", "y"])
+        self.assertEqual(chains[(index["B"], index["A"])], ["y", "x"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,13 +5,66 @@ import networkx as nx
 import os
 from pathlib import Path
 from typing import Dict, Tuple, Set
+from functools import lru_cache
 import time
 from utils.traffic_lights import add_traffic_lights_to_map, load_traffic_lights_data
 
+@lru_cache(maxsize=None)
+def _read_network_csvs(data_dir: Path) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Read and clean the road network CSV files once per data directory.
+
+    Args:
+        data_dir: Directory containing the network CSV files
+
+    Returns:
+        Tuple of (neighborhoods, roads, facilities) DataFrames. Callers must
+        not modify them in place.
+    """
+    # Verify data files exist
+    required_files = ["neighborhoods.csv", "roads.csv", "facilities.csv"]
+    for file in required_files:
+        if not (data_dir / file).exists():
+            raise FileNotFoundError(f"Required data file not found: {file}")
+
+    # Load the data from CSV files with explicit encoding
+    neighborhoods = pd.read_csv(
+        data_dir / "neighborhoods.csv",
+        skipinitialspace=True,
+        encoding='utf-8'
+    )
+    roads = pd.read_csv(
+        data_dir / "roads.csv",
+        skipinitialspace=True,
+        encoding='utf-8'
+    )
+    facilities = pd.read_csv(
+        data_dir / "facilities.csv",
+        skipinitialspace=True,
+        encoding='utf-8'
+    )
+
+    # Clean column names and data
+    for df in [neighborhoods, roads, facilities]:
+        df.columns = df.columns.str.strip()
+        # Convert ID columns to string and strip whitespace
+        id_columns = ['ID', 'FromID', 'ToID']
+        for col in id_columns:
+            if col in df.columns:
+                df[col] = df[col].astype(str).str.strip()
+        # Clean other string columns
+        for col in df.select_dtypes(include=['object']).columns:
+            df[col] = df[col].str.strip()
+
+    return neighborhoods, roads, facilities
+
 def load_data():
     """
     Load and clean the data from CSV files.
     
+    The parsed network CSVs are cached, so repeated calls (one per Streamlit
+    interaction) only copy the frames instead of re-reading and re-cleaning them.
+    
     Returns:
         Tuple containing:
         - neighborhoods: DataFrame of neighborhood data
@@ -24,48 +77,52 @@ def load_data():
         current_dir = Path(__file__).parent.parent
         data_dir = current_dir / "data"
 
-        # Verify data files exist
-        required_files = ["neighborhoods.csv", "roads.csv", "facilities.csv"]
-        for file in required_files:
-            if not (data_dir / file).exists():
-                raise FileNotFoundError(f"Required data file not found: {file}")
-
-        # Load the data from CSV files with explicit encoding
-        neighborhoods = pd.read_csv(
-            data_dir / "neighborhoods.csv",
-            skipinitialspace=True,
-            encoding='utf-8'
-        )
-        roads = pd.read_csv(
-            data_dir / "roads.csv",
-            skipinitialspace=True,
-            encoding='utf-8'
-        )
-        facilities = pd.read_csv(
-            data_dir / "facilities.csv",
-            skipinitialspace=True,
-            encoding='utf-8'
+        # Copy the cached frames so callers (e.g. build_map scenarios) can modify them
+        neighborhoods, roads, facilities = (
+            df.copy() for df in _read_network_csvs(data_dir)
         )
         
         # Load traffic lights data
         traffic_lights = load_traffic_lights_data()
         
-        # Clean column names and data
-        for df in [neighborhoods, roads, facilities]:
-            df.columns = df.columns.str.strip()
-            # Convert ID columns to string and strip whitespace
-            id_columns = ['ID', 'FromID', 'ToID']
-            for col in id_columns:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).str.strip()
-            # Clean other string columns
-            for col in df.select_dtypes(include=['object']).columns:
-                df[col] = df[col].str.strip()
-        
         return neighborhoods, roads, facilities, traffic_lights
     except Exception as e:
         raise Exception(f"Error loading data: {str(e)}")
 
+@lru_cache(maxsize=None)
+def _read_transit_csvs(data_dir: Path) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Read the raw transit CSV files once per data directory.
+
+    Args:
+        data_dir: Directory containing the transit CSV files
+
+    Returns:
+        Tuple of (bus_routes, metro_lines, demand_data, neighborhoods) DataFrames
+        with stripped column names. Callers must not modify them in place.
+    """
+    # Load transit data files
+    transit_files = ["bus_routes.csv", "metro_lines.csv", "demand_data.csv"]
+    for file in transit_files:
+        file_path = data_dir / file
+        if not file_path.exists():
+            raise FileNotFoundError(f"Transit data file not found: {file_path}")
+
+    # Load and clean data with explicit encoding
+    bus_routes = pd.read_csv(data_dir / "bus_routes.csv", skipinitialspace=True, encoding='utf-8')
+    bus_routes.columns = bus_routes.columns.str.strip()
+
+    metro_lines = pd.read_csv(data_dir / "metro_lines.csv", skipinitialspace=True, encoding='utf-8')
+    metro_lines.columns = metro_lines.columns.str.strip()
+
+    demand_data = pd.read_csv(data_dir / "demand_data.csv", skipinitialspace=True, encoding='utf-8')
+    demand_data.columns = demand_data.columns.str.strip()
+
+    # Load neighborhoods for name-to-ID mapping
+    neighborhoods = pd.read_csv(data_dir / "neighborhoods.csv", skipinitialspace=True, encoding='utf-8')
+
+    return bus_routes, metro_lines, demand_data, neighborhoods
+
 def load_transit_data(valid_nodes: Set[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[Tuple[str, str], int], Set[str]]:
     """
     Load and validate transit data including bus routes, metro lines, and demand data.
@@ -85,25 +142,10 @@ def load_transit_data(valid_nodes: Set[str] = None) -> Tuple[pd.DataFrame, pd.Da
         current_dir = Path(__file__).parent.parent
         data_dir = current_dir / "data"
 
-        # Load transit data files
-        transit_files = ["bus_routes.csv", "metro_lines.csv", "demand_data.csv"]
-        for file in transit_files:
-            file_path = data_dir / file
-            if not file_path.exists():
-                raise FileNotFoundError(f"Transit data file not found: {file_path}")
-
-        # Load and clean data with explicit encoding
-        bus_routes = pd.read_csv(data_dir / "bus_routes.csv", skipinitialspace=True, encoding='utf-8')
-        bus_routes.columns = bus_routes.columns.str.strip()
-
-        metro_lines = pd.read_csv(data_dir / "metro_lines.csv", skipinitialspace=True, encoding='utf-8')
-        metro_lines.columns = metro_lines.columns.str.strip()
-
-        demand_data = pd.read_csv(data_dir / "demand_data.csv", skipinitialspace=True, encoding='utf-8')
-        demand_data.columns = demand_data.columns.str.strip()
+        # Raw CSV frames are cached per data directory and treated as read-only below
+        bus_routes, metro_lines, demand_data, neighborhoods = _read_transit_csvs(data_dir)
 
-        # Load neighborhoods for name-to-ID mapping
-        neighborhoods = pd.read_csv(data_dir / "neighborhoods.csv", skipinitialspace=True, encoding='utf-8')
+        # Map neighborhood names to IDs
         name_to_id = {
             str(row['Name']).strip(): str(row['ID']).strip()
             for _, row in neighborhoods.iterrows()
@@ -128,16 +170,16 @@ def load_transit_data(valid_nodes: Set[str] = None) -> Tuple[pd.DataFrame, pd.Da
         # Process bus routes
         valid_bus_routes = []
         bus_stops = set()
-        for _, route in bus_routes.iterrows():
+        # Plain record dicts avoid building a Series per row
+        for route_dict in bus_routes.to_dict('records'):
             try:
-                stops = [str(s).strip() for s in str(route['Stops']).split(',')]
+                stops = [str(s).strip() for s in str(route_dict['Stops']).split(',')]
                 
                 # Filter valid stops
                 if valid_nodes:
                     stops = [stop for stop in stops if stop in valid_nodes]
                     
                 if len(stops) >= 2:  # Only keep routes with at least 2 valid stops
-                    route_dict = route.to_dict()
                     route_dict['Stops'] = ','.join(stops)
                     # Clean string values
                     for key in route_dict:
@@ -151,16 +193,15 @@ def load_transit_data(valid_nodes: Set[str] = None) -> Tuple[pd.DataFrame, pd.Da
         # Process metro lines
         valid_metro_lines = []
         metro_stations = set()
-        for _, line in metro_lines.iterrows():
+        for line_dict in metro_lines.to_dict('records'):
             try:
-                stations = [str(s).strip() for s in str(line['Stations']).split(',')]
+                stations = [str(s).strip() for s in str(line_dict['Stations']).split(',')]
                 
                 # Filter valid stations
                 if valid_nodes:
                     stations = [station for station in stations if station in valid_nodes]
                     
                 if len(stations) >= 2:  # Only keep lines with at least 2 valid stations
-                    line_dict = line.to_dict()
                     line_dict['Stations'] = ','.join(stations)
                     # Clean string values
                     for key in line_dict:
@@ -198,7 +239,8 @@ def build_map(neighborhoods, roads, facilities, scenario=None, show_facilities=T
         neighborhoods (pd.DataFrame): Neighborhoods data
         roads (pd.DataFrame): Roads data
         facilities (pd.DataFrame): Facilities data
-        scenario (str, optional): Scenario for road closures
+        scenario (str, optional): Scenario for road closures; either a named
+            scenario or comma-separated IDs of closed nodes
         show_facilities (bool): Whether to show facilities on the map
         show_traffic_lights (bool): Whether to show traffic lights
     
@@ -265,63 +307,73 @@ def build_map(neighborhoods, roads, facilities, scenario=None, show_facilities=T
                 # Reduce capacity during rush hour
                 filtered_roads = roads.copy()
                 filtered_roads["Current Capacity(vehicles/hour)"] = filtered_roads["Current Capacity(vehicles/hour)"] * 0.7
+            else:
+                # Custom scenario: comma-separated IDs of closed nodes (exact match)
+                closed_ids = {node_id.strip() for node_id in str(scenario).split(',') if node_id.strip()}
+                from_closed = roads["FromID"].astype(str).str.strip().isin(closed_ids)
+                to_closed = roads["ToID"].astype(str).str.strip().isin(closed_ids)
+                filtered_roads = roads.loc[~(from_closed | to_closed)]
             
         # Current time for traffic light calculation
         current_time = int(time.time())
             
+        # Index traffic lights by road once (first light wins, either direction)
+        lights_by_road = {}
+        if traffic_lights is not None and not traffic_lights.empty:
+            for light in traffic_lights.to_dict('records'):
+                lights_by_road.setdefault((light["FromID"], light["ToID"]), light)
+                lights_by_road.setdefault((light["ToID"], light["FromID"]), light)
+        
+        # Keep only roads whose endpoints are both known nodes (vectorized)
+        from_ids = filtered_roads["FromID"].astype(str).str.strip()
+        to_ids = filtered_roads["ToID"].astype(str).str.strip()
+        valid_mask = from_ids.isin(node_positions) & to_ids.isin(node_positions)
+        valid_roads = filtered_roads[valid_mask]
+        road_rows = zip(
+            from_ids[valid_mask], to_ids[valid_mask],
+            valid_roads["Name"], valid_roads["Distance(km)"],
+            valid_roads["Current Capacity(vehicles/hour)"], valid_roads["Condition(1-10)"]
+        )
+        
         # Add road connections with validation
-        for _, row in filtered_roads.iterrows():
+        road_edges = []
+        for from_id, to_id, name, distance, capacity, condition in road_rows:
             try:
-                from_id = str(row["FromID"]).strip()
-                to_id = str(row["ToID"]).strip()
+                # Check if there's a traffic light at this road
+                traffic_light_data = lights_by_road.get((from_id, to_id))
+                has_traffic_light = traffic_light_data is not None
                 
-                if from_id in node_positions and to_id in node_positions:
-                    # Check if there's a traffic light at this road
-                    has_traffic_light = False
-                    traffic_light_data = None
-                    
-                    if traffic_lights is not None and not traffic_lights.empty:
-                        light = traffic_lights[
-                            ((traffic_lights["FromID"] == from_id) & (traffic_lights["ToID"] == to_id)) |
-                            ((traffic_lights["FromID"] == to_id) & (traffic_lights["ToID"] == from_id))
-                        ]
-                        if not light.empty:
-                            has_traffic_light = True
-                            traffic_light_data = light.iloc[0].to_dict()
-                    
-                    # Add edge to graph with all attributes
-                    edge_attrs = {
-                        "name": str(row["Name"]).strip(),
-                        "weight": float(row["Distance(km)"]),
-                        "capacity": float(row["Current Capacity(vehicles/hour)"]),
-                        "condition": float(row["Condition(1-10)"]),
-                        "has_traffic_light": has_traffic_light
-                    }
-                    
-                    # Add traffic light data if available
-                    if traffic_light_data:
-                        edge_attrs["traffic_light"] = traffic_light_data
-                    
-                    graph.add_edge(
-                        from_id, to_id,
-                        **edge_attrs
-                    )
-                    
-                    # Draw road on map
-                    popup_text = f"{row['Name']}<br>Distance: {row['Distance(km)']} km<br>Capacity: {row['Current Capacity(vehicles/hour)']} vehicles/hour<br>Condition: {row['Condition(1-10)']} / 10"
-                    
-                    if has_traffic_light:
-                        popup_text += "<br><strong>Traffic Light</strong>"
-                    
-                    folium.PolyLine(
-                        [node_positions[from_id], node_positions[to_id]],
-                        color="gray",
-                        weight=1,
-                        opacity=0.4,
-                        popup=popup_text
-                    ).add_to(m)
+                # Add edge to graph with all attributes
+                edge_attrs = {
+                    "name": str(name).strip(),
+                    "weight": float(distance),
+                    "capacity": float(capacity),
+                    "condition": float(condition),
+                    "has_traffic_light": has_traffic_light
+                }
+                
+                # Add traffic light data if available
+                if traffic_light_data:
+                    edge_attrs["traffic_light"] = traffic_light_data
+                
+                road_edges.append((from_id, to_id, edge_attrs))
+                
+                # Draw road on map
+                popup_text = f"{name}<br>Distance: {distance} km<br>Capacity: {capacity} vehicles/hour<br>Condition: {condition} / 10"
+                
+                if has_traffic_light:
+                    popup_text += "<br><strong>Traffic Light</strong>"
+                
+                folium.PolyLine(
+                    [node_positions[from_id], node_positions[to_id]],
+                    color="gray",
+                    weight=1,
+                    opacity=0.4,
+                    popup=popup_text
+                ).add_to(m)
             except Exception:
                 continue
+        graph.add_edges_from(road_edges)
 
         # Add markers for neighborhoods
         for _, row in neighborhoods.iterrows():
@@ -136,8 +136,19 @@ def calculate_traffic_light_delay(from_id, to_id, traffic_lights, current_time=N
         return 0.0
     
     # Get the first matching traffic light
-    light = light.iloc[0]
+    return light_delay(light.iloc[0], current_time)
+
+def light_delay(light, current_time):
+    """
+    Calculate the delay caused by one traffic light at a given time.
+    
+    Args:
+        light: Traffic light row or record with CycleTime, GreenTime and YellowTime
+        current_time: Current time in seconds
     
+    Returns:
+        float: Estimated delay in minutes
+    """
     cycle_time = int(light['CycleTime'])
     green_time = int(light['GreenTime'])
     yellow_time = int(light['YellowTime'])